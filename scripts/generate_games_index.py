@@ -8,19 +8,76 @@ Prerequisites:
     1. Register your application at https://boardgamegeek.com/applications
     2. Add your BGG API token to .env file: BGG_API_TOKEN=your-token-here
 """
+import io
 import json
 import os
+import re
+import threading
 import time
 import xml.etree.ElementTree as ET
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson  # Optional: faster (de)serialization of the index file
+except ImportError:
+    orjson = None
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Any Cyrillic character marks a Russian alternate name
+CYRILLIC_RE = re.compile("[\u0400-\u04FF]")
+
+
+def _create_session() -> requests.Session:
+    """Create HTTP session with keep-alive connection pool for BGG requests."""
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+    session.headers["User-Agent"] = (
+        "RulesLawyerBot/1.0 (https://github.com/RomanShnurov/RulesLawyerBot)"
+    )
+    return session
+
+
+# Shared session: search and details requests reuse one TCP+TLS connection
+SESSION = _create_session()
+
+# BGG politeness limits shared by all lookup threads
+BGG_MAX_WORKERS = 4
+BGG_MAX_IN_FLIGHT = 2
+BGG_MIN_REQUEST_INTERVAL = 1.0  # seconds between request starts
+
+_bgg_slots = threading.BoundedSemaphore(BGG_MAX_IN_FLIGHT)
+_rate_lock = threading.Lock()
+_last_request_time = 0.0
+
+
+def _bgg_get(url: str, params: dict, headers: dict) -> requests.Response:
+    """GET a BGG API URL, respecting the shared in-flight and rate limits.
+
+    Request starts are spaced at least BGG_MIN_REQUEST_INTERVAL apart across
+    all threads, while responses of in-flight requests overlap.
+    """
+    global _last_request_time
+
+    with _bgg_slots:
+        with _rate_lock:
+            wait = _last_request_time + BGG_MIN_REQUEST_INTERVAL - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            _last_request_time = time.monotonic()
+
+        response = SESSION.get(url, params=params, headers=headers, timeout=10)
+        response.raise_for_status()
+        return response
+
 
 def search_bgg_game(game_name: str) -> Optional[dict]:
     """
@@ -48,65 +105,73 @@ def search_bgg_game(game_name: str) -> Optional[dict]:
         "exact": 1  # Exact match
     }
 
-    headers = {
-        "User-Agent": "RulesLawyerBot/1.0 (https://github.com/RomanShnurov/RulesLawyerBot)",
-        "Authorization": f"Bearer {bgg_token}"
-    }
+    headers = {"Authorization": f"Bearer {bgg_token}"}
 
     try:
-        response = requests.get(search_url, params=params, headers=headers, timeout=10)
-        response.raise_for_status()
+        response = _bgg_get(search_url, params, headers)
 
-        root = ET.fromstring(response.content)
-        items = root.findall("item")
+        # Take first result
+        item = ET.fromstring(response.content).find("item")
 
-        if not items:
+        if item is None:
             print(f"⚠️  '{game_name}' not found in BGG")
             return None
 
-        # Take first result
-        game_id = items[0].get("id")
-
-        # Get game details
-        # BGG API requires delay between requests
-        time.sleep(1)
+        game_id = item.get("id")
 
+        # Get game details (BGG API delay between requests is enforced by _bgg_get)
         details_url = "https://boardgamegeek.com/xmlapi2/thing"
         details_params = {"id": game_id, "type": "boardgame"}
 
-        details_response = requests.get(details_url, params=details_params, headers=headers, timeout=10)
-        details_response.raise_for_status()
-
-        details_root = ET.fromstring(details_response.content)
-        item = details_root.find("item")
-
-        if item is None:
-            return None
+        details_response = _bgg_get(details_url, details_params, headers)
 
-        # Extract names
-        names = item.findall("name")
+        # Stream-parse details: only names and the first 5 categories/mechanics
+        # are kept, so stop as soon as they are collected and free parsed elements
+        found_item = False
         primary_name = None
         alternate_names = []
-
-        for name in names:
-            name_type = name.get("type")
-            name_value = name.get("value")
-
-            if name_type == "primary":
-                primary_name = name_value
-            elif name_type == "alternate":
-                alternate_names.append(name_value)
-
-        # Extract categories/mechanics for tags
-        categories = [cat.get("value") for cat in item.findall("link[@type='boardgamecategory']")]
-        mechanics = [mech.get("value") for mech in item.findall("link[@type='boardgamemechanic']")]
+        categories = []
+        mechanics = []
+
+        for event, elem in ET.iterparse(
+            io.BytesIO(details_response.content), events=("start", "end")
+        ):
+            if event == "start":
+                if elem.tag == "item":
+                    found_item = True
+                continue
+
+            if elem.tag == "name":
+                name_type = elem.get("type")
+                if name_type == "primary":
+                    primary_name = elem.get("value")
+                elif name_type == "alternate":
+                    alternate_names.append(elem.get("value"))
+
+            elif elem.tag == "link":
+                link_type = elem.get("type")
+                if link_type == "boardgamecategory" and len(categories) < 5:
+                    categories.append(elem.get("value"))
+                elif link_type == "boardgamemechanic" and len(mechanics) < 5:
+                    mechanics.append(elem.get("value"))
+
+                if primary_name and len(categories) == 5 and len(mechanics) == 5:
+                    break
+
+            elif elem.tag == "item":
+                break  # Only the first item is relevant
+
+            elem.clear()
+
+        if not found_item:
+            return None
 
         return {
             "bgg_id": game_id,
             "primary_name": primary_name,
             "alternate_names": alternate_names,
-            "categories": categories[:5],  # First 5
-            "mechanics": mechanics[:5]
+            "categories": categories,  # First 5
+            "mechanics": mechanics
         }
 
     except Exception as e:
@@ -114,6 +179,21 @@ def search_bgg_game(game_name: str) -> Optional[dict]:
         return None
 
 
+def load_index(index_file: Path) -> dict:
+    """Read games_index.json in one read call."""
+    data = index_file.read_bytes()
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def save_index(games_index: dict, index_file: Path) -> None:
+    """Serialize games_index.json and write it in one write call."""
+    if orjson is not None:
+        data = orjson.dumps(games_index, option=orjson.OPT_INDENT_2)
+    else:
+        data = json.dumps(games_index, ensure_ascii=False, indent=2).encode("utf-8")
+    index_file.write_bytes(data)
+
+
 def generate_index_from_pdfs():
     """Generate games_index.json from PDF files in rules_pdfs/"""
 
@@ -121,54 +201,63 @@ def generate_index_from_pdfs():
     output_file = pdf_dir / "games_index.json"
 
     # Load existing index
+    existing_data = {}
     existing_games = {}
     if output_file.exists():
-        with open(output_file, encoding="utf-8") as f:
-            existing_data = json.load(f)
-            existing_games = {
-                game["english_name"]: game
-                for game in existing_data.get("games", [])
-            }
-            print(f"📖 Loaded existing index: {len(existing_games)} games")
+        existing_data = load_index(output_file)
+        existing_games = {
+            game["english_name"]: game
+            for game in existing_data.get("games", [])
+        }
+        print(f"📖 Loaded existing index: {len(existing_games)} games")
 
-    # Find all PDF files
-    pdf_files = list(pdf_dir.glob("*.pdf"))
+    # Find all PDF files in a single directory pass
+    with os.scandir(pdf_dir) as it:
+        pdf_names = sorted(entry.name for entry in it if entry.name.endswith(".pdf"))
 
-    if not pdf_files:
+    if not pdf_names:
         print("❌ No PDF files found in rules_pdfs/")
         return
 
-    print(f"\n🔍 Found {len(pdf_files)} PDF files")
+    print(f"\n🔍 Found {len(pdf_names)} PDF files")
+
+    # Split base games from expansions/FAQs and group related PDFs by base
+    # game: "Root - Riverfolk.pdf" belongs to "Root"
+    game_names = []
+    related = defaultdict(list)
+    for name in pdf_names:
+        base, separator, _ = name[:-4].partition(" - ")
+        related[base].append(name)
+        if not separator:
+            game_names.append(base)
+
+    # Look up games missing from the index concurrently (I/O-bound HTTP calls)
+    new_games = [name for name in game_names if name not in existing_games]
+    bgg_results = {}
+    if new_games:
+        print(f"\n🔎 Searching BGG for {len(new_games)} new game(s)...")
+        with ThreadPoolExecutor(max_workers=BGG_MAX_WORKERS) as pool:
+            bgg_results = dict(zip(new_games, pool.map(search_bgg_game, new_games)))
 
     games_index = {"games": []}
 
-    for pdf_file in sorted(pdf_files):
-        # Skip expansions and FAQ files
-        if " - " in pdf_file.stem:
-            continue
-
-        game_name = pdf_file.stem
-
+    for game_name in game_names:
         # Check if already in index
         if game_name in existing_games:
             print(f"✅ {game_name} (already in index)")
             games_index["games"].append(existing_games[game_name])
             continue
 
-        print(f"\n🔎 Searching BGG for '{game_name}'...")
-        bgg_info = search_bgg_game(game_name)
+        bgg_info = bgg_results[game_name]
 
         # Find all related PDF files
-        related_pdfs = [
-            f.name for f in pdf_dir.glob("*.pdf")
-            if f.stem.startswith(game_name)
-        ]
+        related_pdfs = related[game_name]
 
         if bgg_info:
             # Filter Russian names from alternate_names (Cyrillic check)
             russian_names = [
                 name for name in bgg_info["alternate_names"]
-                if any('\u0400' <= c <= '\u04FF' for c in name)
+                if CYRILLIC_RE.search(name)
             ]
 
             # If no Russian names, add English name as fallback
@@ -198,9 +287,14 @@ def generate_index_from_pdfs():
 
         games_index["games"].append(game_entry)
 
+    # Nothing discovered and nothing removed: keep the existing file as is
+    if not new_games and games_index["games"] == existing_data.get("games"):
+        print(f"\n✅ Index is up to date: {output_file}")
+        print(f"📊 Total games: {len(games_index['games'])}")
+        return
+
     # Save index
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(games_index, f, ensure_ascii=False, indent=2)
+    save_index(games_index, output_file)
 
     print(f"\n✅ Index saved to {output_file}")
     print(f"📊 Total games: {len(games_index['games'])}")
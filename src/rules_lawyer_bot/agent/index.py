@@ -0,0 +1,207 @@
+"""In-memory inverted index over extracted rulebook text.
+
+Most agent searches are plain word roots combined with the Boolean syntax
+(e.g. "move|перемещ|движен jump -ranged"). Those are answered from a per-file
+token → line postings index built once from the text cache, instead of
+spawning ugrep and rescanning the whole file for every query. Anything the
+index can't reproduce exactly (regex, quoted phrases, fuzzy search,
+multi-file output) returns None and falls back to ugrep.
+"""
+
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+
+from src.rules_lawyer_bot.utils.logger import logger
+
+# Same context as ugrep -C20
+CONTEXT_LINES = 20
+
+_INDEX_MAX_FILES = 64
+_WORD = re.compile(r"\w+")
+_TERM = re.compile(r"-?\w+(\|\w+)*")
+# Spelled-out Boolean operators, left to ugrep rather than matched as words
+_OPERATORS = frozenset({"AND", "OR", "NOT"})
+
+
+class FileIndex:
+    """Lines of one extracted text file and postings of their tokens."""
+
+    def __init__(self, text: str):
+        """Build the index.
+
+        Args:
+            text: Extracted text of a PDF
+        """
+        self.lines = text.split("\n")
+        if self.lines and not self.lines[-1]:
+            self.lines.pop()
+
+        postings: defaultdict[str, set[int]] = defaultdict(set)
+        for number, line in enumerate(self.lines):
+            for token in _WORD.findall(line.lower()):
+                postings[token].add(number)
+        self.postings = dict(postings)
+        # Concept roots recur across queries; remember their vocabulary scans
+        self._root_lines: dict[str, frozenset[int]] = {}
+
+    def lines_matching(self, root: str) -> set[int]:
+        """Return numbers of lines containing root as a case-insensitive substring.
+
+        A root made of word characters can only occur inside a single token,
+        so scanning the vocabulary gives the same lines as scanning the text.
+
+        Args:
+            root: Word-character search term
+
+        Returns:
+            Set of matching line numbers
+        """
+        root = root.lower()
+        cached = self._root_lines.get(root)
+        if cached is not None:
+            return set(cached)
+
+        matched: set[int] = set()
+        for token, numbers in self.postings.items():
+            if root in token:
+                matched |= numbers
+        self._root_lines[root] = frozenset(matched)
+        return matched
+
+    def search(self, and_terms: list[list[str]], not_terms: list[str]) -> list[int]:
+        """Find lines matching all AND groups and none of the NOT terms.
+
+        Args:
+            and_terms: Groups of OR-ed roots; a line must match every group
+            not_terms: Roots that exclude a line
+
+        Returns:
+            Sorted matching line numbers
+        """
+        matched: set[int] | None = None
+        for alternatives in and_terms:
+            group: set[int] = set()
+            for root in alternatives:
+                group |= self.lines_matching(root)
+            matched = group if matched is None else matched & group
+            if not matched:
+                return []
+
+        for root in not_terms:
+            matched -= self.lines_matching(root)
+
+        return sorted(matched or ())
+
+    def render(self, matches: list[int], context: int = CONTEXT_LINES) -> str:
+        """Render matches with context the way ugrep -C does for a single file.
+
+        Overlapping or adjacent context windows are merged; separate groups
+        are divided by "--".
+
+        Args:
+            matches: Sorted matching line numbers
+            context: Lines of context before and after each match
+
+        Returns:
+            Matching text with context
+        """
+        groups: list[tuple[int, int]] = []
+        for number in matches:
+            start = max(0, number - context)
+            end = min(len(self.lines), number + context + 1)
+            if groups and start <= groups[-1][1]:
+                groups[-1] = (groups[-1][0], max(groups[-1][1], end))
+            else:
+                groups.append((start, end))
+
+        return "\n--\n".join("\n".join(self.lines[start:end]) for start, end in groups)
+
+
+def parse_query(pattern: str) -> tuple[list[list[str]], list[str]] | None:
+    """Parse an expanded Boolean query into AND groups and NOT terms.
+
+    Args:
+        pattern: Query after concept expansion, e.g. "move|ход jump -ranged"
+
+    Returns:
+        (and_terms, not_terms), or None if the query needs ugrep
+        (regex syntax, quotes, AND/OR/NOT operators, NOT-only queries)
+    """
+    and_terms: list[list[str]] = []
+    not_terms: list[str] = []
+    for term in pattern.split():
+        if not _TERM.fullmatch(term) or _OPERATORS.intersection(term.lstrip("-").split("|")):
+            return None
+        if term.startswith("-"):
+            not_terms.extend(term[1:].split("|"))
+        else:
+            and_terms.append(term.split("|"))
+
+    if not and_terms:
+        return None
+    return and_terms, not_terms
+
+
+class RulesIndex:
+    """LRU of per-file indexes, keyed by text path and modification time."""
+
+    def __init__(self, max_files: int = _INDEX_MAX_FILES):
+        """Initialize an empty index cache.
+
+        Args:
+            max_files: Number of file indexes kept in memory
+        """
+        self._max_files = max_files
+        self._files: OrderedDict[tuple[str, int], FileIndex] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, text_path: Path) -> FileIndex:
+        """Return the index of a text file, building it if needed.
+
+        Args:
+            text_path: Path to extracted text
+
+        Returns:
+            FileIndex for the current file contents
+        """
+        key = (str(text_path), text_path.stat().st_mtime_ns)
+        with self._lock:
+            index = self._files.get(key)
+            if index is not None:
+                self._files.move_to_end(key)
+                return index
+
+        index = FileIndex(text_path.read_text(encoding="utf-8", errors="replace"))
+        logger.debug(f"Indexed {text_path.name}: {len(index.postings)} tokens")
+
+        with self._lock:
+            # Drop indexes of older versions of the same file
+            for stale in [k for k in self._files if k[0] == key[0]]:
+                del self._files[stale]
+            self._files[key] = index
+            while len(self._files) > self._max_files:
+                self._files.popitem(last=False)
+        return index
+
+    def search(self, text_path: Path, pattern: str) -> str | None:
+        """Search a text file without running ugrep.
+
+        Args:
+            text_path: Path to extracted text
+            pattern: Query after concept expansion
+
+        Returns:
+            Matching text with context ("" if nothing matched), or None if
+            the query can't be answered from the index
+        """
+        query = parse_query(pattern)
+        if query is None:
+            return None
+
+        index = self.get(text_path)
+        return index.render(index.search(*query))
+
+
+rules_index = RulesIndex()
@@ -0,0 +1,162 @@
+"""Deterministic front router for trivial queries.
+
+"What games do you have?" and "do you have Wingspan?" don't need the
+structured-output agent: they are recognized with anchored patterns and
+answered from the library listing. Everything else (and anything the
+patterns are unsure about) goes to the agent as a rules question.
+"""
+
+import re
+from typing import Literal, NamedTuple
+
+from src.rules_lawyer_bot.agent.tools import library_pdf_names
+
+QueryRoute = Literal["discovery", "existence", "rules"]
+
+# Whole-message patterns; (pattern, language)
+_DISCOVERY_PATTERNS: list[tuple[re.Pattern, str]] = [
+    (
+        re.compile(
+            r"(а\s+)?(какие|что\s+за)\s+(у\s+(тебя|вас)\s+)?(есть\s+)?игры"
+            r"(\s+у\s+(тебя|вас))?(\s+есть)?",
+            re.IGNORECASE,
+        ),
+        "ru",
+    ),
+    (
+        re.compile(
+            r"((покажи|выведи|дай)(те)?\s+)?(мне\s+)?(весь\s+|полный\s+)?список\s+(всех\s+)?игр",
+            re.IGNORECASE,
+        ),
+        "ru",
+    ),
+    (
+        re.compile(
+            r"(what|which)\s+games\s+(do\s+you\s+have|are\s+(there|available)|can\s+you\s+help\s+with)",
+            re.IGNORECASE,
+        ),
+        "en",
+    ),
+    (
+        re.compile(
+            r"((show|list)\s+(me\s+)?(all\s+)?(the\s+)?(available\s+)?games|list\s+of\s+games)",
+            re.IGNORECASE,
+        ),
+        "en",
+    ),
+]
+
+_EXISTENCE_PATTERNS: list[tuple[re.Pattern, str]] = [
+    (
+        re.compile(
+            r"(а\s+)?(есть\s+ли\s+у\s+(тебя|вас)|у\s+(тебя|вас)\s+есть|имеется\s+ли)"
+            r"\s+(правила\s+(для|по|к)\s+|игра\s+)?(?P<game>.+?)",
+            re.IGNORECASE,
+        ),
+        "ru",
+    ),
+    (
+        re.compile(
+            r"(do|have)\s+you\s+(have|got)\s+(the\s+)?(rules\s+for\s+|rulebook\s+for\s+)?(?P<game>.+?)",
+            re.IGNORECASE,
+        ),
+        "en",
+    ),
+]
+
+_TRAILING = " \t\n?!.«»\"'"
+
+
+class RouteResult(NamedTuple):
+    """Classification of a user message."""
+
+    route: QueryRoute
+    language: str = "ru"
+    game: str | None = None
+
+
+class DirectAnswer(NamedTuple):
+    """Templated answer sent without running the agent."""
+
+    text: str
+    game: str | None = None
+    pdf_file: str | None = None
+
+
+def classify(question: str) -> RouteResult:
+    """Classify a user message as discovery, existence or rules question.
+
+    Args:
+        question: User message text
+
+    Returns:
+        RouteResult with route, answer language and (for existence) game name
+    """
+    text = question.strip().strip(_TRAILING)
+
+    for pattern, language in _DISCOVERY_PATTERNS:
+        if pattern.fullmatch(text):
+            return RouteResult("discovery", language)
+
+    for pattern, language in _EXISTENCE_PATTERNS:
+        match = pattern.fullmatch(text)
+        if match:
+            return RouteResult("existence", language, match.group("game").strip(_TRAILING))
+
+    return RouteResult("rules")
+
+
+def build_direct_answer(result: RouteResult) -> DirectAnswer | None:
+    """Answer a discovery/existence query from the library listing.
+
+    Existence queries are only answered when exactly one game is found by
+    filename; otherwise (e.g. a Russian title, several candidates, or a rules
+    question that merely starts with "do you have") the agent handles it.
+
+    Args:
+        result: Classification from classify()
+
+    Returns:
+        DirectAnswer, or None if the agent should handle the message
+    """
+    if result.route == "rules":
+        return None
+
+    games = [name[:-4] for name in library_pdf_names()]
+
+    if result.route == "discovery":
+        if not games:
+            return None
+        game_list = "\n".join(f"{i}. {name}" for i, name in enumerate(games, 1))
+        if result.language == "en":
+            text = (
+                f"🎮 Games in my library:\n\n{game_list}\n\n"
+                "Ask me anything about the rules of these games!"
+            )
+        else:
+            text = (
+                f"🎮 В моей библиотеке есть следующие игры:\n\n{game_list}\n\n"
+                "Можете задать любой вопрос о правилах этих игр!"
+            )
+        return DirectAnswer(text)
+
+    # Whole-word match of a non-trivial name ("do you have it?" is not a game)
+    query = result.game.lower()
+    if len(query) < 3:
+        return None
+    word = re.compile(rf"(?<!\w){re.escape(query)}(?!\w)", re.IGNORECASE)
+    matches = [name for name in games if word.search(name)]
+    if not matches:
+        return None
+
+    exact = [name for name in matches if name.lower() == query]
+    game = exact[0] if exact else matches[0] if len(matches) == 1 else None
+    if game is None:
+        # Several candidates: the agent asks via its game selection keyboard
+        return None
+
+    if result.language == "en":
+        text = f"✅ Yes, I have the rules for {game}! Ask me anything about this game."
+    else:
+        text = f"✅ Да, у меня есть правила для {game}! Можете задать любой вопрос о механиках этой игры."
+    return DirectAnswer(text, game, f"{game}.pdf")
@@ -11,6 +11,7 @@ from enum import Enum
 from typing import Optional
 
 from pydantic import BaseModel, Field
+from pydantic.json_schema import SkipJsonSchema
 
 
 class ActionType(str, Enum):
@@ -152,3 +153,14 @@ class PipelineOutput(BaseModel):
     stage_reasoning: str = Field(
         description="Explanation of current stage decision and next steps"
     )
+
+
+class PipelineOutputSlim(PipelineOutput):
+    """PipelineOutput without stage_reasoning in the output schema.
+
+    stage_reasoning is generated last, after everything sent to the user,
+    so outside of audits it only adds output tokens (decode time). The field
+    is left out of the JSON schema and defaults to an empty string.
+    """
+
+    stage_reasoning: SkipJsonSchema[str] = ""
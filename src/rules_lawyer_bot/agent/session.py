@@ -0,0 +1,247 @@
+"""In-memory conversation session with batched SQLite persistence."""
+
+import asyncio
+import sqlite3
+import threading
+import weakref
+from collections import deque
+
+from agents import SQLiteSession
+from agents.items import TResponseInputItem
+from agents.memory.session import SessionABC
+
+from src.rules_lawyer_bot.utils.logger import logger
+
+# Live sessions, so pending writes can be flushed on shutdown
+_live_sessions: "weakref.WeakSet[RingSession]" = weakref.WeakSet()
+
+# Memory-mapped reads of the shared sessions database (64 MB)
+_SQLITE_MMAP_SIZE = 64 * 1024 * 1024
+
+
+class _ThreadConnections:
+    """Tuned connections to one database file, one per thread, shared by all sessions."""
+
+    def __init__(self, db_path: str):
+        """Initialize without opening a connection.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self._db_path = db_path
+        self._local = threading.local()
+        self._opened: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def get(self) -> sqlite3.Connection:
+        """Get the calling thread's connection, opening and tuning it on first use."""
+        conn = getattr(self._local, "connection", None)
+        if conn is None:
+            conn = sqlite3.connect(self._db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={_SQLITE_MMAP_SIZE}")
+            self._local.connection = conn
+            with self._lock:
+                self._opened.append(conn)
+        return conn
+
+    def close(self) -> None:
+        """Close the connections of all threads."""
+        with self._lock:
+            opened, self._opened = self._opened, []
+            self._local = threading.local()
+        for conn in opened:
+            conn.close()
+
+
+# Connections per database file, shared by every session stored in it
+_connections: dict[str, _ThreadConnections] = {}
+_connections_lock = threading.Lock()
+
+
+def _shared_connections(db_path: str) -> _ThreadConnections:
+    """Get the shared connections to a database file."""
+    with _connections_lock:
+        connections = _connections.get(db_path)
+        if connections is None:
+            connections = _connections[db_path] = _ThreadConnections(db_path)
+        return connections
+
+
+def close_session_connections() -> None:
+    """Close all shared session database connections (call on shutdown)."""
+    with _connections_lock:
+        connections = list(_connections.values())
+    for shared in connections:
+        shared.close()
+
+
+class TunedSQLiteSession(SQLiteSession):
+    """SQLiteSession on shared connections with pragmas suited to WAL mode.
+
+    The SDK opens one connection per thread for every session instance, so
+    each cached user session would hold its own database, WAL and shm file
+    descriptors on every worker thread. Here all sessions of a database file
+    share one connection per thread instead.
+
+    The SDK keeps SQLite's default synchronous=FULL, which fsyncs the WAL on
+    every commit. With WAL, NORMAL is still crash-safe (only the last
+    commits may roll back on power loss) and syncs only at checkpoints.
+
+    The SDK has no public per-connection hook, so this replaces the method it
+    calls for every operation; tests/test_session.py pins that assumption.
+    """
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """Get the thread's shared connection to the database file."""
+        if str(self.db_path) == ":memory:":
+            return super()._get_connection()
+        return _shared_connections(str(self.db_path)).get()
+
+    def close(self) -> None:
+        """Release the session; shared file connections stay open for other sessions."""
+        if str(self.db_path) == ":memory:":
+            super().close()
+
+
+class RingSession(SessionABC):
+    """Keep the last N conversation items in RAM and persist them in batches.
+
+    Reads are served from a bounded deque (loaded once from SQLite), so only
+    the recent part of a conversation is replayed to the model. Writes are
+    queued and flushed to SQLite in one transaction after a short delay or
+    once enough items are pending, instead of one commit per agent turn.
+    """
+
+    def __init__(
+        self,
+        store: SQLiteSession,
+        max_items: int = 40,
+        flush_delay: float = 2.0,
+        flush_threshold: int = 32,
+    ):
+        """Initialize ring session.
+
+        Args:
+            store: Persistent session the items are flushed to
+            max_items: Number of most recent items kept and replayed
+            flush_delay: Seconds to wait before flushing pending items
+            flush_threshold: Pending item count that triggers immediate flush
+        """
+        self.session_id = store.session_id
+        self._store = store
+        self._max_items = max_items
+        self._flush_delay = flush_delay
+        self._flush_threshold = flush_threshold
+        self._items: deque[TResponseInputItem] | None = None
+        self._pending: list[TResponseInputItem] = []
+        self._flush_task: asyncio.Task | None = None
+        _live_sessions.add(self)
+
+    async def _load(self) -> deque[TResponseInputItem]:
+        """Load recent items from the store on first use."""
+        if self._items is None:
+            recent = await self._store.get_items(limit=self._max_items)
+            self._items = deque(recent, maxlen=self._max_items)
+        return self._items
+
+    async def get_items(self, limit: int | None = None) -> list[TResponseInputItem]:
+        """Return recent items, starting at a user message.
+
+        The ring can cut a tool call off from its output, which the API
+        rejects, so items before the first remaining user message are dropped.
+
+        Args:
+            limit: Maximum number of most recent items to return
+
+        Returns:
+            Items in chronological order
+        """
+        items = list(await self._load())
+        start = next(
+            (
+                i
+                for i, item in enumerate(items)
+                if isinstance(item, dict) and item.get("role") == "user"
+            ),
+            len(items),
+        )
+        items = items[start:]
+        if limit is not None:
+            items = items[-limit:] if limit > 0 else []
+        return items
+
+    async def add_items(self, items: list[TResponseInputItem]) -> None:
+        """Add items to the ring and queue them for persistence.
+
+        Args:
+            items: Items to append
+        """
+        if not items:
+            return
+
+        (await self._load()).extend(items)
+        self._pending.extend(items)
+
+        if len(self._pending) >= self._flush_threshold:
+            await self.flush()
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        """Flush pending items after the flush delay."""
+        await asyncio.sleep(self._flush_delay)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Write all pending items to the store in one batch."""
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        try:
+            await self._store.add_items(batch)
+        except Exception:
+            logger.exception(f"Failed to persist session {self.session_id}")
+
+    async def close(self) -> None:
+        """Flush pending items and close the store."""
+        await self.flush()
+        self._store.close()
+
+    async def pop_item(self) -> TResponseInputItem | None:
+        """Remove and return the most recent item.
+
+        Returns:
+            Removed item or None if the session is empty
+        """
+        items = await self._load()
+        if not items:
+            return None
+
+        item = items.pop()
+        if self._pending:
+            self._pending.pop()
+        else:
+            await self._store.pop_item()
+        return item
+
+    async def clear_session(self) -> None:
+        """Clear all items from the ring and the store."""
+        self._items = deque(maxlen=self._max_items)
+        self._pending = []
+        await self._store.clear_session()
+
+
+async def flush_all_sessions(session_id: str | None = None) -> None:
+    """Flush pending items of every live session (call on shutdown).
+
+    Args:
+        session_id: Only flush sessions with this ID (e.g. instances of a
+                    conversation that are no longer cached but may still hold
+                    unpersisted items)
+    """
+    for session in list(_live_sessions):
+        if session_id is None or session.session_id == session_id:
+            await session.flush()
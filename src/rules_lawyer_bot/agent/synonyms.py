@@ -0,0 +1,70 @@
+"""Deterministic concept → ugrep pattern expansion.
+
+The agent passes short concept names (e.g. "movement") and the search tools
+expand them server-side into Russian morphological roots and English stems,
+instead of the model improvising regex alternations in every request.
+"""
+
+# Concept -> roots matched case-insensitively as substrings by ugrep.
+# Keep roots short enough to cover inflections (атак → атака, атаки, атакует)
+# and free of spaces, which ugrep's Boolean mode reads as AND.
+SYNONYMS: dict[str, list[str]] = {
+    "movement": ["move", "перемещ", "движен", "передвиж", "ход", "идти", "шаг"],
+    "attack": ["attack", "атак", "удар", "бой", "сраж", "нанес", "урон"],
+    "action": ["action", "действ", "актив", "ход", "фаза"],
+    "defense": ["defen", "block", "защит", "оборон", "блок"],
+    "damage": ["damage", "wound", "урон", "ранен", "поврежд"],
+    "health": ["health", "life", "здоров", "жизн", "хп"],
+    "turn": ["turn", "ход", "раунд", "очеред"],
+    "round": ["round", "раунд", "круг"],
+    "setup": ["setup", "подготов", "расклад"],
+    "victory": ["victory", "win", "побед", "выигр"],
+    "card": ["card", "карт"],
+    "dice": ["dice", "die", "кубик", "кост"],
+    "resource": ["resource", "ресурс"],
+    "score": ["score", "point", "очк", "подсч"],
+}
+
+
+def build_ugrep_pattern(concepts: list[str]) -> str:
+    """Build a pipe-joined ugrep OR pattern from concept names.
+
+    Known concepts expand to their roots; unknown ones are kept as-is.
+    Duplicates are dropped while preserving order.
+
+    Args:
+        concepts: Concept names or literal search terms
+
+    Returns:
+        Pattern like "move|перемещ|движен|..."
+    """
+    alternatives: dict[str, None] = {}
+    for concept in concepts:
+        for root in SYNONYMS.get(concept.lower(), [concept]):
+            alternatives[root] = None
+    return "|".join(alternatives)
+
+
+def expand_keywords(keywords: str) -> str:
+    """Expand known concept names inside a Boolean ugrep query.
+
+    Each space-separated AND term is split on "|" and its concept names are
+    replaced with their roots. NOT terms ("-x") and quoted phrases are kept
+    verbatim so exclusions and exact matches keep their meaning.
+
+    Args:
+        keywords: Boolean query, e.g. "attack armor" or "movement|teleport"
+
+    Returns:
+        Query with concepts expanded, e.g. "attack|атак|... armor"
+    """
+    if '"' in keywords:
+        return keywords
+
+    terms = []
+    for term in keywords.split():
+        if term.startswith("-"):
+            terms.append(term)
+        else:
+            terms.append(build_ugrep_pattern(term.split("|")))
+    return " ".join(terms)
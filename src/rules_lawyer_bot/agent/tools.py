@@ -2,22 +2,66 @@
 
 import asyncio
 import json
-import subprocess
-from functools import wraps
+import multiprocessing
+import os
+import stat
+import time
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache, partial, wraps
+from itertools import islice
 from pathlib import Path
-from typing import Callable, TypeVar
+from typing import Any, Awaitable, Callable, Iterable, Iterator, TypeVar
 
 from agents import function_tool
-from pypdf import PdfReader
 
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the stdlib encoder
+    orjson = None
+
+from src.rules_lawyer_bot.agent.index import rules_index
+from src.rules_lawyer_bot.agent.synonyms import expand_keywords
 from src.rules_lawyer_bot.config import settings
 from src.rules_lawyer_bot.utils.logger import logger
-from src.rules_lawyer_bot.utils.safety import safe_execution, ugrep_semaphore
+from src.rules_lawyer_bot.utils.safety import BotError, safe_execution, ugrep_semaphore
 from src.rules_lawyer_bot.utils.timer import ScopeTimer
 
 # Type variable for decorator
 F = TypeVar("F", bound=Callable)
 
+# One extraction per PDF at a time (parallel searches share the result)
+_extraction_locks: defaultdict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+# Library listing cache: key -> (library root mtime, created at, value).
+# Root mtime catches added/removed PDFs; the TTL bounds staleness for
+# changes inside subfolders, which don't touch the root's mtime.
+_LISTING_CACHE_TTL = 300.0
+_LISTING_CACHE_MAX_SIZE = 1024
+_listing_cache: dict[tuple, tuple[int, float, Any]] = {}
+
+# Search result cache (LRU): (cache dir, files, mtimes, keywords, fuzzy) -> output.
+# File mtimes in the key invalidate entries when a PDF is replaced.
+_SEARCH_CACHE_MAX_SIZE = 512
+_search_cache: OrderedDict[tuple, str] = OrderedDict()
+
+# Search output limit in characters; the byte budget covers it for
+# Cyrillic/Latin text (at most 2 bytes per character in UTF-8)
+_MAX_OUTPUT_CHARS = 30000
+_MAX_OUTPUT_BYTES = 2 * _MAX_OUTPUT_CHARS
+
+# Directory tree output limit in characters
+_TREE_OUTPUT_LIMIT = 10000
+
+# read_full_document output limit in characters
+_FULL_TEXT_LIMIT = 100000
+
+# pypdf is pure Python and holds the GIL, so long PDFs are extracted in
+# page chunks on a process pool; short ones aren't worth the round trip
+_PDF_POOL_MIN_PAGES = 20
+_PDF_POOL_CHUNK_PAGES = 16
+_PDF_POOL_WORKERS = min(4, os.cpu_count() or 1)
+
 
 def async_tool(func: F) -> F:
     """Decorator to run synchronous tool functions in thread pool.
@@ -39,6 +83,211 @@ def async_tool(func: F) -> F:
     return wrapper
 
 
+def _dumps_indented(data: dict[str, str]) -> str:
+    """Encode tool output as indented JSON, keeping non-ASCII text readable.
+
+    Uses orjson when installed; the output matches
+    json.dumps(data, ensure_ascii=False, indent=2).
+
+    Args:
+        data: JSON-serializable mapping
+
+    Returns:
+        JSON string
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(data, ensure_ascii=False, indent=2)
+
+
+async def _bounded_map(
+    coro_fn: Callable[[Any], Awaitable[Any]], items: list[Any], limit: int
+) -> list[Any]:
+    """Await coro_fn(item) for every item with at most `limit` running at once.
+
+    Unlike gather() over one task per item, only `limit` worker tasks are
+    created; they take items in order until none are left. Like
+    gather(return_exceptions=True), exceptions are returned in place of results.
+
+    Args:
+        coro_fn: Coroutine function applied to each item
+        items: Items to process
+        limit: Number of workers
+
+    Returns:
+        Results (or exceptions) in the order of items
+    """
+    results: list[Any] = [None] * len(items)
+    queue = iter(enumerate(items))
+
+    async def _worker() -> None:
+        for position, item in queue:
+            try:
+                results[position] = await coro_fn(item)
+            except Exception as e:
+                results[position] = e
+
+    await asyncio.gather(*(_worker() for _ in range(min(limit, len(items)))))
+    return results
+
+
+_MISS = object()
+
+
+def _fresh_listing(key: tuple) -> Any:
+    """Return a cached library listing if it is still current.
+
+    Args:
+        key: Cache key (without the library path, which is added here)
+
+    Returns:
+        Cached value, or _MISS if it has to be built
+    """
+    library = settings.pdf_storage_path
+    try:
+        mtime_ns = os.stat(library).st_mtime_ns
+    except FileNotFoundError:
+        return _MISS
+
+    cached = _listing_cache.get((library, *key))
+    if cached and cached[0] == mtime_ns and time.monotonic() - cached[1] < _LISTING_CACHE_TTL:
+        return cached[2]
+    return _MISS
+
+
+def _cached_listing(key: tuple, build: Callable[[], Any]) -> Any:
+    """Return a cached library listing, rebuilding it when the library changes.
+
+    Args:
+        key: Cache key (without the library path, which is added here)
+        build: Function computing the value on a cache miss
+
+    Returns:
+        Cached or freshly built value
+    """
+    library = settings.pdf_storage_path
+    try:
+        mtime_ns = os.stat(library).st_mtime_ns
+    except FileNotFoundError:
+        return build()
+
+    key = (library, *key)
+    now = time.monotonic()
+    cached = _listing_cache.get(key)
+    if cached and cached[0] == mtime_ns and now - cached[1] < _LISTING_CACHE_TTL:
+        return cached[2]
+
+    value = build()
+    if len(_listing_cache) >= _LISTING_CACHE_MAX_SIZE:
+        _listing_cache.clear()
+    _listing_cache[key] = (mtime_ns, now, value)
+    return value
+
+
+async def _cached_listing_async(key: tuple, build: Callable[[], Any]) -> Any:
+    """Like _cached_listing, but build a missing listing in the thread pool.
+
+    A hit is served on the event loop; a miss scans the library directory.
+
+    Args:
+        key: Cache key (without the library path, which is added here)
+        build: Function computing the value on a cache miss
+
+    Returns:
+        Cached or freshly built value
+    """
+    value = _fresh_listing(key)
+    if value is _MISS:
+        value = await asyncio.to_thread(_cached_listing, key, build)
+    return value
+
+
+def library_pdf_names() -> list[str]:
+    """List PDF filenames at the library root (cached).
+
+    Returns:
+        Sorted PDF filenames
+    """
+    def _scan() -> list[str]:
+        with os.scandir(settings.pdf_storage_path) as entries:
+            return sorted(entry.name for entry in entries if entry.name.endswith(".pdf"))
+
+    return _cached_listing(("pdf_names",), _scan)
+
+
+def library_game_names() -> tuple[str, ...]:
+    """List game names (PDF filenames without extension) at the library root (cached).
+
+    Returns:
+        Sorted game names
+    """
+    return _cached_listing(
+        ("game_names",), lambda: tuple(sorted(name[:-4] for name in library_pdf_names()))
+    )
+
+
+def library_game_keys() -> tuple[tuple[str, str], ...]:
+    """List (game name, lowercase game name) pairs of library games (cached).
+
+    Returns:
+        Pairs in library_game_names() order
+    """
+    return _cached_listing(
+        ("game_keys",), lambda: tuple((name, name.lower()) for name in library_game_names())
+    )
+
+
+def _library_pdf_names_lower() -> list[tuple[str, str]]:
+    """List (filename, lowercase filename) pairs of library PDFs (cached).
+
+    Returns:
+        Pairs in library_pdf_names() order
+    """
+    return _cached_listing(
+        ("pdf_names_lower",), lambda: [(name, name.lower()) for name in library_pdf_names()]
+    )
+
+
+def _library_pdf_trigrams() -> dict[str, frozenset[int]]:
+    """Index library PDFs by the 3-character windows of their lowercase names (cached).
+
+    Returns:
+        Trigram -> positions in _library_pdf_names_lower()
+    """
+    def _build() -> dict[str, frozenset[int]]:
+        trigrams: defaultdict[str, set[int]] = defaultdict(set)
+        for position, (_, name_lower) in enumerate(_library_pdf_names_lower()):
+            for i in range(len(name_lower) - 2):
+                trigrams[name_lower[i:i + 3]].add(position)
+        return {trigram: frozenset(positions) for trigram, positions in trigrams.items()}
+
+    return _cached_listing(("pdf_trigrams",), _build)
+
+
+def _match_filenames(query_lower: str) -> list[str]:
+    """Find library PDFs whose lowercase name contains the query.
+
+    Queries of 3+ characters only check names containing all of their
+    trigrams; shorter ones scan the whole listing.
+
+    Args:
+        query_lower: Lowercase search term
+
+    Returns:
+        Matching filenames in library_pdf_names() order
+    """
+    names = _library_pdf_names_lower()
+    if len(query_lower) < 3:
+        candidates = range(len(names))
+    else:
+        trigrams = _library_pdf_trigrams()
+        windows = {query_lower[i:i + 3] for i in range(len(query_lower) - 2)}
+        positions = min((trigrams.get(w, frozenset()) for w in windows), key=len)
+        candidates = sorted(positions)
+
+    return [names[i][0] for i in candidates if query_lower in names[i][1]]
+
+
 @function_tool
 @safe_execution
 @async_tool
@@ -122,10 +371,11 @@ def find_game_by_name(query: str) -> str:
         return json.dumps(result, ensure_ascii=False, indent=2)
 
 
+# Safe on the event loop: a stat of the library root plus in-memory lookups
+# (the listing itself is rescanned only when the library changes)
 @function_tool
 @safe_execution
-@async_tool
-def search_filenames(query: str) -> str:
+async def search_filenames(query: str) -> str:
     """Search for PDF files by filename in the rules library.
 
     Args:
@@ -135,15 +385,15 @@ def search_filenames(query: str) -> str:
         List of matching filenames or error message
     """
     with ScopeTimer(f"search_filenames('{query}')"):
-        pdf_dir = Path(settings.pdf_storage_path)
-        if not pdf_dir.exists():
-            return f"Error: PDF directory not found at {pdf_dir}"
-
-        # Case-insensitive search
+        # Case-insensitive search over the cached listing (no directory walk);
+        # matches are cached per query, since users re-ask about the same games
         query_lower = query.lower()
-        matches = [
-            f.name for f in pdf_dir.glob("*.pdf") if query_lower in f.name.lower()
-        ]
+        try:
+            matches = await _cached_listing_async(
+                ("filename_matches", query_lower), lambda: _match_filenames(query_lower)
+            )
+        except FileNotFoundError:
+            return f"Error: PDF directory not found at {settings.pdf_storage_path}"
 
         if not matches:
             return f"No PDF files found matching '{query}'"
@@ -158,6 +408,289 @@ def search_filenames(query: str) -> str:
         return f"Found {len(matches)} file(s):\n" + "\n".join(matches)
 
 
+async def _extract_pdf_text(filename: str) -> None:
+    """Extract PDF text with pdftotext into the text cache, if not cached yet.
+
+    The cached file keeps the PDF's relative path and mtime, so it is
+    re-extracted whenever the PDF is replaced, and ugrep output run from the
+    cache directory shows the PDF filename.
+
+    Args:
+        filename: PDF path relative to the rules library
+    """
+    pdf_path = Path(settings.pdf_storage_path) / filename
+    text_path = Path(settings.text_cache_dir) / filename
+    pdf_mtime_ns = pdf_path.stat().st_mtime_ns
+
+    try:
+        if text_path.stat().st_mtime_ns == pdf_mtime_ns:
+            return
+    except FileNotFoundError:
+        pass
+
+    text_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = text_path.with_name(f".{text_path.name}.tmp")
+
+    with ScopeTimer(f"pdftotext('{filename}')"):
+        proc = await asyncio.create_subprocess_exec(
+            "pdftotext",
+            str(pdf_path),
+            str(tmp_path),
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            _, stderr = await asyncio.wait_for(proc.communicate(), timeout=120)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.communicate()
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    if proc.returncode != 0:
+        tmp_path.unlink(missing_ok=True)
+        raise BotError(
+            f"Search error: could not extract text from '{filename}'",
+            f"pdftotext failed for {pdf_path}: {stderr.decode(errors='replace').strip()}",
+        )
+
+    os.utime(tmp_path, ns=(pdf_mtime_ns, pdf_mtime_ns))
+    os.replace(tmp_path, text_path)
+
+
+async def _ensure_text_cached(filenames: list[str]) -> None:
+    """Make sure the text cache holds an up-to-date extraction of every PDF.
+
+    Args:
+        filenames: PDF paths relative to the rules library
+    """
+    for filename in filenames:
+        async with _extraction_locks[filename]:
+            await _extract_pdf_text(filename)
+
+
+async def warm_text_cache() -> None:
+    """Extract text of every library PDF ahead of the first search.
+
+    Runs extractions concurrently (bounded by the ugrep semaphore), so a
+    cold start doesn't make the first question about each game wait for
+    pdftotext. Failures are logged and retried lazily by the next search.
+    """
+    filenames = await asyncio.to_thread(library_pdf_names)
+
+    async def _extract(filename: str) -> None:
+        async with ugrep_semaphore:
+            await _ensure_text_cached([filename])
+
+    with ScopeTimer(f"warm_text_cache({len(filenames)} PDFs)"):
+        results = await asyncio.gather(
+            *(_extract(filename) for filename in filenames), return_exceptions=True
+        )
+
+    failed = [name for name, result in zip(filenames, results) if isinstance(result, Exception)]
+    if failed:
+        logger.warning(f"Text extraction failed for {len(failed)} PDF(s): {failed}")
+    logger.info(f"Text cache ready for {len(filenames) - len(failed)} PDF(s)")
+
+
+def _build_ugrep_command(keywords: str, filenames: list[str], fuzzy: bool) -> list[str]:
+    """Build the ugrep command line for a Boolean search over cached PDF text.
+
+    Args:
+        keywords: Boolean query (concept names are expanded to roots)
+        filenames: PDF paths relative to the rules library (and text cache)
+        fuzzy: Enable fuzzy matching
+
+    Returns:
+        Command argument list for subprocess
+    """
+    # Expand concept names (e.g. "movement") into morphological roots
+    pattern = expand_keywords(keywords)
+
+    # Build ugrep command
+    # -%: Boolean patterns (space=AND, |=OR, -=NOT)
+    # -i: case insensitive
+    # -C20: 20 lines context (enough for rule understanding)
+    # PDFs are pre-extracted to text once, so no per-search --filter decode
+    cmd = [
+        "ugrep",
+        "-%",  # Boolean query mode
+        "-i",  # Case insensitive
+        "-C20",  # 20 lines of context
+        "--",  # Pattern and file names may start with "-"
+        pattern,
+        *filenames,
+    ]
+
+    # Add fuzzy matching for typo tolerance
+    if fuzzy:
+        cmd.insert(2, "-Z")  # Insert after -%
+
+    return cmd
+
+
+async def _read_limited(stream: asyncio.StreamReader, limit: int) -> bytes:
+    """Read up to limit bytes, stopping early only at EOF.
+
+    Args:
+        stream: Process output stream
+        limit: Maximum number of bytes to read
+
+    Returns:
+        Bytes read
+    """
+    try:
+        return await stream.readexactly(limit)
+    except asyncio.IncompleteReadError as e:
+        return e.partial
+
+
+async def _run_ugrep(cmd: list[str], keywords: str) -> str:
+    """Run a ugrep command in the text cache and normalize its output.
+
+    Output is streamed and ugrep is killed as soon as the truncation limit is
+    reached, so broad queries don't scan (and buffer) the rest of the files.
+
+    Args:
+        cmd: Command built by _build_ugrep_command
+        keywords: Original query (for logging)
+
+    Returns:
+        Matching text (truncated), "No matches found" or search error message
+    """
+    logger.debug("Searching with ugrep command: " + " ".join(cmd))
+
+    # Use semaphore to limit concurrent ugrep processes
+    async with ugrep_semaphore:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            cwd=settings.text_cache_dir,  # Relative names: output shows PDF names
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            # Prevent hanging
+            data = await asyncio.wait_for(
+                _read_limited(proc.stdout, _MAX_OUTPUT_BYTES + 1), timeout=30
+            )
+            truncated = len(data) > _MAX_OUTPUT_BYTES
+            if truncated:
+                proc.kill()
+            # Drain what's left in the pipes: wait() alone blocks until they
+            # close, which never happens while the stdout buffer is full
+            _, stderr = await proc.communicate()
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.communicate()
+            raise
+
+    if truncated or proc.returncode == 0:
+        output = data.decode("utf-8", errors="ignore").strip()
+        # Truncate to avoid token overflow
+        logger.debug(f"ugrep output: {output}")
+        if truncated or len(output) > _MAX_OUTPUT_CHARS:
+            output = output[:_MAX_OUTPUT_CHARS] + "\n...(truncated)"
+        return output if output else "No matches found"
+
+    elif proc.returncode == 1:
+        logger.debug(f"No matches found for '{keywords}'")
+        return "No matches found"
+
+    else:
+        error = stderr.decode("utf-8", errors="replace").strip()
+        logger.error(f"ugrep error: {error}")
+        return f"Search error: {error}"
+
+
+async def _search_index(filename: str, keywords: str) -> str | None:
+    """Answer a single-file search from the in-memory index, if possible.
+
+    Args:
+        filename: PDF path relative to the rules library
+        keywords: Boolean query
+
+    Returns:
+        Output formatted like _run_ugrep, or None if ugrep is needed
+    """
+    text_path = Path(settings.text_cache_dir) / filename
+    output = await asyncio.to_thread(rules_index.search, text_path, expand_keywords(keywords))
+    if output is None:
+        return None
+
+    output = output.strip()
+    if len(output) > _MAX_OUTPUT_CHARS:
+        output = output[:_MAX_OUTPUT_CHARS] + "\n...(truncated)"
+    return output if output else "No matches found"
+
+
+def _search_cache_key(filenames: list[str], keywords: str, fuzzy: bool) -> tuple:
+    """Build the search result cache key.
+
+    Uses PDF mtimes, which the text cache copies onto its extractions, so a
+    key can be built (and probed) before the text is extracted.
+
+    Args:
+        filenames: PDF paths relative to the rules library
+        keywords: Boolean query
+        fuzzy: Enable fuzzy matching
+
+    Returns:
+        Key for _search_cache
+    """
+    pdf_dir = Path(settings.pdf_storage_path)
+    mtimes = tuple((pdf_dir / filename).stat().st_mtime_ns for filename in filenames)
+    return (settings.text_cache_dir, tuple(filenames), mtimes, keywords, fuzzy)
+
+
+def _search_cache_get(key: tuple) -> str | None:
+    """Return a cached search result and mark it recently used.
+
+    Args:
+        key: Key from _search_cache_key()
+
+    Returns:
+        Cached output, or None on a miss
+    """
+    cached = _search_cache.get(key)
+    if cached is not None:
+        _search_cache.move_to_end(key)
+    return cached
+
+
+async def _search_cached(filenames: list[str], keywords: str, fuzzy: bool) -> str:
+    """Search cached PDF text with ugrep, reusing results of identical searches.
+
+    Args:
+        filenames: PDF paths relative to the rules library
+        keywords: Boolean query
+        fuzzy: Enable fuzzy matching
+
+    Returns:
+        Search output as returned by _run_ugrep
+    """
+    key = _search_cache_key(filenames, keywords, fuzzy)
+    cached = _search_cache_get(key)
+    if cached is not None:
+        logger.debug(f"Search cache hit for '{keywords}'")
+        return cached
+
+    await _ensure_text_cached(filenames)
+
+    result = None
+    if len(filenames) == 1 and not fuzzy:
+        result = await _search_index(filenames[0], keywords)
+    if result is None:
+        result = await _run_ugrep(_build_ugrep_command(keywords, filenames, fuzzy), keywords)
+
+    # Errors may be transient (timeouts, missing binaries) - don't cache them
+    if not result.startswith("Search error"):
+        _search_cache[key] = result
+        if len(_search_cache) > _SEARCH_CACHE_MAX_SIZE:
+            _search_cache.popitem(last=False)
+
+    return result
+
+
 async def _search_inside_file_ugrep_impl(
     filename: str, keywords: str, fuzzy: bool = False
 ) -> str:
@@ -171,53 +704,48 @@ async def _search_inside_file_ugrep_impl(
         if not pdf_path.exists():
             raise FileNotFoundError(f"'{filename}'")
 
-        # Build ugrep command
-        # -%: Boolean patterns (space=AND, |=OR, -=NOT)
-        # -i: case insensitive
-        # -C20: 20 lines context (enough for rule understanding)
-        # --filter: convert PDF to text on-the-fly (stdin -> stdout)
-        cmd = [
-            "ugrep",
-            "-%",  # Boolean query mode
-            "-i",  # Case insensitive
-            "-C20",  # 20 lines of context
-            "--filter=pdf:pdftotext - -",  # PDF text extraction (stdin to stdout)
-            keywords,
-            str(pdf_path),
-        ]
+        return await _search_cached([filename], keywords, fuzzy)
 
-        # Add fuzzy matching for typo tolerance
-        if fuzzy:
-            cmd.insert(2, "-Z")  # Insert after -%
 
-        logger.debug("Searching with ugrep command: " + " ".join(cmd))
+async def _search_inside_files_ugrep_impl(
+    filenames: list[str], keywords: str, fuzzy: bool = False
+) -> str:
+    """Internal implementation of multi-file ugrep search.
 
-        # Use semaphore to limit concurrent ugrep processes
-        async with ugrep_semaphore:
-            result = await asyncio.to_thread(
-                subprocess.run,
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=30,  # Prevent hanging
-            )
+    Searches every file concurrently, so each one can be served from the
+    in-memory index or the result cache, and wall-clock time is that of the
+    slowest file rather than the sum.
+    """
+    with ScopeTimer(f"search_inside_files_ugrep({len(filenames)} files, '{keywords}')"):
+        if not filenames:
+            return "Error: No files provided"
 
-        if result.returncode == 0:
-            output = result.stdout.strip()
-            # Truncate to avoid token overflow
-            logger.debug(f"ugrep output: {output}")
-            if len(output) > 30000:
-                output = output[:30000] + "\n...(truncated)"
-            return output if output else "No matches found"
+        # Limit to reasonable number of files per search
+        if len(filenames) > 10:
+            logger.warning(f"Too many files to search ({len(filenames)}), limiting to 10")
+            filenames = filenames[:10]
 
-        elif result.returncode == 1:
-            logger.debug(f"No matches found for '{keywords}'")
+        pdf_dir = Path(settings.pdf_storage_path)
+        missing = [filename for filename in filenames if not (pdf_dir / filename).exists()]
+        if missing:
+            raise FileNotFoundError(", ".join(f"'{name}'" for name in missing))
+
+        results = await asyncio.gather(
+            *(_search_cached([filename], keywords, fuzzy) for filename in filenames)
+        )
+
+        sections = [
+            f"### {filename}\n{result}"
+            for filename, result in zip(filenames, results)
+            if result != "No matches found"
+        ]
+        if not sections:
             return "No matches found"
 
-        else:
-            error = result.stderr.strip()
-            logger.error(f"ugrep error: {error}")
-            return f"Search error: {error}"
+        output = "\n\n".join(sections)
+        if len(output) > _MAX_OUTPUT_CHARS:
+            output = output[:_MAX_OUTPUT_CHARS] + "\n...(truncated)"
+        return output
 
 
 @function_tool
@@ -235,6 +763,9 @@ async def search_inside_file_ugrep(
                   - Dash - means NOT: "attack -ranged" excludes ranged
                   - Combine: "attack|strike armor -magic"
                   - Quotes for exact phrases: '"end of turn"'
+                  - Concept names (movement, attack, action, defense, damage,
+                    health, turn, round, setup, victory, card, dice, resource,
+                    score) expand to Russian/English roots automatically
         fuzzy: Enable fuzzy matching to handle typos (default: False)
 
     Returns:
@@ -245,10 +776,37 @@ async def search_inside_file_ugrep(
         search_inside_file_ugrep("game.pdf", "move|teleport enemy")
         search_inside_file_ugrep("game.pdf", "attack -ranged")
         search_inside_file_ugrep("game.pdf", "movment", fuzzy=True)
+        search_inside_file_ugrep("game.pdf", "attack|сила")  # attack expanded
     """
     return await _search_inside_file_ugrep_impl(filename, keywords, fuzzy)
 
 
+@function_tool
+@safe_execution
+async def search_inside_files_ugrep(
+    filenames: list[str], keywords: str, fuzzy: bool = False
+) -> str:
+    """Search several PDF files at once, in parallel.
+
+    Use this when the answer may be spread over multiple rulebooks of the same
+    game (e.g. base game and expansions). Results of each file are listed
+    under a "### <filename>" header; files without matches are omitted.
+
+    Args:
+        filenames: Names of the PDF files (must exist in rules_pdfs/, max 10)
+        keywords: Search keywords with the same Boolean syntax as
+                  search_inside_file_ugrep
+        fuzzy: Enable fuzzy matching to handle typos (default: False)
+
+    Returns:
+        Matching text snippets with context or error message
+
+    Examples:
+        search_inside_files_ugrep(["Root.pdf", "Root - Riverfolk.pdf"], "movement")
+    """
+    return await _search_inside_files_ugrep_impl(filenames, keywords, fuzzy)
+
+
 @function_tool
 @safe_execution
 async def parallel_search_terms(filename: str, terms: list[str], fuzzy: bool = False) -> str:
@@ -286,32 +844,51 @@ async def parallel_search_terms(filename: str, terms: list[str], fuzzy: bool = F
             logger.warning(f"Too many parallel search terms ({len(terms)}), limiting to 10")
             terms = terms[:10]
 
-        logger.info(f"Launching {len(terms)} parallel searches in '{filename}'")
-
-        # Launch all searches in parallel using the internal implementation
-        # (not the @function_tool wrapper which isn't directly callable)
-        tasks = [
-            _search_inside_file_ugrep_impl(filename, term, fuzzy=fuzzy)
-            for term in terms
-        ]
-
-        # Gather results (exceptions are already handled by @safe_execution)
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Duplicate terms would search twice for the same JSON key
+        terms = list(dict.fromkeys(terms))
+
+        # Answer repeated terms from the result cache without scheduling them
+        cached_results = {}
+        for term in terms:
+            try:
+                cached = _search_cache_get(_search_cache_key([filename], term, fuzzy))
+            except FileNotFoundError:
+                cached = None  # Reported per term by the search below
+            if cached is not None:
+                cached_results[term] = cached
+        missing_terms = [term for term in terms if term not in cached_results]
+
+        logger.info(
+            f"Launching {len(missing_terms)} parallel searches in '{filename}' "
+            f"({len(cached_results)} cached)"
+        )
+
+        # Run searches on a fixed number of workers using the internal
+        # implementation (not the @function_tool wrapper which isn't directly
+        # callable); more would only wait on the ugrep semaphore
+        searched = await _bounded_map(
+            partial(_search_inside_file_ugrep_impl, filename, fuzzy=fuzzy),
+            missing_terms,
+            limit=settings.max_concurrent_searches,
+        )
+        results = {**dict(zip(missing_terms, searched)), **cached_results}
 
         # Build result dictionary
         result_dict = {}
-        for term, result in zip(terms, results):
+        for term in terms:
+            result = results[term]
+            # The internal search raises (e.g. FileNotFoundError); _bounded_map
+            # returns those exceptions in place of results
             if isinstance(result, Exception):
-                result_dict[term] = f"Error: {str(result)}"
-            else:
-                # Truncate individual results to avoid huge outputs
-                if len(str(result)) > 5000:
-                    result_dict[term] = str(result)[:5000] + "\n...(truncated)"
-                else:
-                    result_dict[term] = str(result)
+                result_dict[term] = f"Error: {result}"
+                continue
+
+            # Truncate individual results to avoid huge outputs
+            text = result if isinstance(result, str) else str(result)
+            result_dict[term] = text[:5000] + "\n...(truncated)" if len(text) > 5000 else text
 
         # Return as formatted JSON for easy parsing
-        output = json.dumps(result_dict, ensure_ascii=False, indent=2)
+        output = _dumps_indented(result_dict)
 
         logger.info(f"Parallel search completed: {len(result_dict)} results")
         return output
@@ -323,7 +900,8 @@ async def parallel_search_terms(filename: str, terms: list[str], fuzzy: bool = F
 def read_full_document(filename: str) -> str:
     """Fallback: Read entire PDF content using pypdf library.
 
-    Use this when ugrep fails or is unavailable.
+    Use this when ugrep fails or is unavailable. If the search text cache
+    already holds an up-to-date pdftotext extraction, it is read instead.
 
     Args:
         filename: Name of the PDF file
@@ -336,26 +914,177 @@ def read_full_document(filename: str) -> str:
         if not pdf_path.exists():
             raise FileNotFoundError(f"'{filename}'")
 
-        reader = PdfReader(pdf_path)
-        text_parts = []
+        pdf_mtime_ns = pdf_path.stat().st_mtime_ns
+        text_path = Path(settings.text_cache_dir) / filename
+        try:
+            if text_path.stat().st_mtime_ns == pdf_mtime_ns:
+                return _read_cached_text(text_path)
+        except FileNotFoundError:
+            pass
+
+        return _extract_full_text(str(pdf_path), pdf_mtime_ns)
+
+
+def _join_pages(page_texts: Iterable[str]) -> str:
+    """Join page texts with page markers, stopping at the output limit.
 
-        for page_num, page in enumerate(reader.pages, 1):
-            text_parts.append(f"--- Page {page_num} ---\n")
-            text_parts.append(page.extract_text())
+    Args:
+        page_texts: Text of each page, in order (consumed lazily)
+
+    Returns:
+        Page-annotated text, truncated to 100k chars
+    """
+    text_parts = []
+    total_length = 0
+
+    for page_num, page_text in enumerate(page_texts, 1):
+        # Header and text as one part (the header's blank line was the separator)
+        part = f"--- Page {page_num} ---\n\n{page_text}"
+        text_parts.append(part)
+        total_length += len(part) + 1  # + "\n" separator
+
+        # Pages past the limit would be truncated away; don't extract them
+        if total_length > _FULL_TEXT_LIMIT:
+            break
+
+    full_text = "\n".join(text_parts)
+
+    # Truncate to avoid context overflow
+    if len(full_text) > _FULL_TEXT_LIMIT:
+        full_text = full_text[:_FULL_TEXT_LIMIT] + "\n...(truncated at 100k chars)"
+
+    return full_text
+
+
+def _read_cached_text(text_path: Path) -> str:
+    """Read a pdftotext extraction from the text cache.
+
+    pdftotext ends every page with a form feed. Page markers only add
+    characters, so reading the first 100k characters of text is enough.
+
+    Args:
+        text_path: Path of the cached text file
+
+    Returns:
+        Page-annotated text, truncated to 100k chars
+    """
+    with open(text_path, encoding="utf-8", errors="replace") as f:
+        text = f.read(_FULL_TEXT_LIMIT + 1)
+    pages = text.split("\f")
+    if pages and not pages[-1]:
+        pages.pop()
+    return _join_pages(pages)
+
+
+@lru_cache(maxsize=8)
+def _extract_full_text(pdf_path: str, mtime_ns: int) -> str:
+    """Extract PDF text with pypdf (cached per file version).
 
-        full_text = "\n".join(text_parts)
+    Args:
+        pdf_path: Path of the PDF file
+        mtime_ns: PDF modification time, part of the cache key
+
+    Returns:
+        Page-annotated text, truncated to 100k chars
+    """
+    # Imported on first use: the fallback is rare and pypdf is slow to import
+    from pypdf import PdfReader
+
+    page_count = len(PdfReader(pdf_path).pages)
+    return _join_pages(_page_texts(pdf_path, page_count))
+
+
+@lru_cache(maxsize=1)
+def _pdf_pool() -> ProcessPoolExecutor:
+    """Get the process pool for pypdf extraction (created on first use)."""
+    # forkserver: forking the bot itself would copy its threads and sockets
+    return ProcessPoolExecutor(
+        max_workers=_PDF_POOL_WORKERS,
+        mp_context=multiprocessing.get_context("forkserver"),
+    )
+
+
+def _extract_pages(pdf_path: str, start: int, end: int) -> list[str]:
+    """Extract text of pages [start, end) with pypdf.
+
+    Runs in a pool worker for long PDFs, in the calling thread otherwise.
+
+    Args:
+        pdf_path: Path of the PDF file
+        start: Index of the first page
+        end: Index past the last page
+
+    Returns:
+        Text of each page
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(pdf_path)
+    texts = []
+    for index in range(start, min(end, len(reader.pages))):
+        try:
+            texts.append(reader.pages[index].extract_text())
+        except Exception as e:
+            # One broken page shouldn't lose the rest of the rulebook
+            logger.warning(f"pypdf failed on page {index + 1} of {pdf_path}: {e}")
+            texts.append("[text extraction failed]")
+    return texts
 
-        # Truncate to avoid context overflow
-        if len(full_text) > 100000:
-            full_text = full_text[:100000] + "\n...(truncated at 100k chars)"
 
-        return full_text
+def _page_texts(pdf_path: str, page_count: int) -> Iterator[str]:
+    """Yield page texts in order, extracting long PDFs on the process pool.
+
+    Only a worker's worth of chunks is scheduled ahead of the consumer, so
+    when the caller stops early (output limit reached) the remaining pages
+    are never extracted.
+
+    Args:
+        pdf_path: Path of the PDF file
+        page_count: Number of pages in the PDF
+
+    Yields:
+        Text of each page
+    """
+    if page_count <= _PDF_POOL_MIN_PAGES:
+        yield from _extract_pages(pdf_path, 0, page_count)
+        return
+
+    pool = _pdf_pool()
+    starts = iter(range(0, page_count, _PDF_POOL_CHUNK_PAGES))
+
+    def submit(start: int) -> Future:
+        return pool.submit(_extract_pages, pdf_path, start, start + _PDF_POOL_CHUNK_PAGES)
+
+    pending: deque[Future] = deque(submit(start) for start in islice(starts, _PDF_POOL_WORKERS))
+    try:
+        while pending:
+            texts = pending.popleft().result()
+            for start in islice(starts, 1):
+                pending.append(submit(start))
+            yield from texts
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _render_game_list() -> str | None:
+    """Render the numbered game list returned for small libraries.
+
+    Returns:
+        Game list, or None if the library has more than 20 PDFs
+    """
+    pdf_files = [name[:-4] for name in library_pdf_names()]
+    if len(pdf_files) > 20:
+        return None
+
+    output = f"Available games ({len(pdf_files)}):\n"
+    output += "\n".join(f"{i+1}. {name}" for i, name in enumerate(pdf_files))
+    return output
 
 
 @function_tool
 @safe_execution
-@async_tool
-def list_directory_tree(path: str = "", max_depth: int = 3) -> str:
+async def list_directory_tree(path: str = "", max_depth: int = 3) -> str:
     """List directory structure as a tree.
 
     Use this FIRST to:
@@ -374,73 +1103,116 @@ def list_directory_tree(path: str = "", max_depth: int = 3) -> str:
         base_path = Path(settings.pdf_storage_path)
         target_path = base_path / path if path else base_path
 
-        if not target_path.exists():
+        try:
+            target_stat = target_path.stat()
+        except FileNotFoundError:
             return f"Error: Path '{path}' not found"
 
-        if not target_path.is_dir():
+        if not stat.S_ISDIR(target_stat.st_mode):
             return f"Error: '{path}' is not a directory"
 
         # Smart formatting for game discovery at root level
         if path == "" and target_path == base_path:
-            pdf_files = sorted([f.stem for f in target_path.glob("*.pdf")])
+            output = await _cached_listing_async(("game_list",), _render_game_list)
 
             # Small library: return clean numbered list for discovery
-            if len(pdf_files) <= 20:
-                output = f"Available games ({len(pdf_files)}):\n"
-                output += "\n".join(f"{i+1}. {name}" for i, name in enumerate(pdf_files))
-
+            if output is not None:
                 logger.debug(f"Game discovery list: {output}")
                 return output
 
         # Default tree structure for navigation or large libraries
-        lines = [f"{target_path.name}/"]
-        _build_tree(target_path, lines, "", max_depth, 0)
+        def _render_tree() -> str:
+            lines = [f"{target_path.name}/"]
+            lines.extend(_build_tree(str(target_path), max_depth, _TREE_OUTPUT_LIMIT))
+            return "\n".join(lines)
 
-        output = "\n".join(lines)
+        # The listed folder's mtime also catches changes below the library root.
+        # A cache miss walks the whole subtree, so it runs in the thread pool.
+        output = await asyncio.to_thread(
+            _cached_listing, ("tree", path, max_depth, target_stat.st_mtime_ns), _render_tree
+        )
 
         logger.debug(f"Directory tree output: {output}")
 
         # Truncate to avoid token overflow
-        if len(output) > 10000:
-            output = output[:10000] + "\n...(truncated)"
+        if len(output) > _TREE_OUTPUT_LIMIT:
+            output = output[:_TREE_OUTPUT_LIMIT] + "\n...(truncated)"
 
         return output
 
 
-def _build_tree(
-    directory: Path, lines: list[str], prefix: str, max_depth: int, current_depth: int
-) -> None:
-    """Recursively build tree structure.
+def _tree_items(directory: str) -> Iterator[tuple[os.DirEntry, bool, bool]] | None:
+    """List a directory for the tree: folders first, then PDF files, by name.
 
     Args:
-        directory: Current directory to list
-        lines: List to append formatted lines
-        prefix: Current indentation prefix
-        max_depth: Maximum depth limit
-        current_depth: Current recursion depth
-    """
-    if current_depth >= max_depth:
-        return
+        directory: Directory to list
 
-    # Get items: directories first, then PDF files only
+    Returns:
+        Iterator of (entry, is_dir, is_last), or None if access is denied
+    """
+    # DirEntry caches the type from the directory read, so no stat per entry
     items = []
     try:
-        for item in sorted(directory.iterdir()):
-            if item.is_dir():
-                items.append((item, True))
-            elif item.suffix.lower() == ".pdf":
-                items.append((item, False))
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    items.append((entry, True))
+                elif entry.name.lower().endswith(".pdf"):
+                    items.append((entry, False))
     except PermissionError:
-        lines.append(f"{prefix}[Permission denied]")
-        return
+        return None
+
+    items.sort(key=lambda item: (not item[1], item[0].name.lower()))
+    return (
+        (entry, is_dir, i == len(items) - 1) for i, (entry, is_dir) in enumerate(items)
+    )
+
 
-    for i, (item, is_dir) in enumerate(items):
-        is_last = i == len(items) - 1
+def _build_tree(directory: str, max_depth: int, max_chars: int) -> list[str]:
+    """Build tree structure lines with an iterative depth-first walk.
+
+    Args:
+        directory: Directory to list
+        max_depth: Maximum depth limit
+        max_chars: Stop once the lines reach this many characters (output
+                   is truncated there anyway)
+
+    Returns:
+        Formatted tree lines (without the root line)
+    """
+    lines: list[str] = []
+    if max_depth <= 0:
+        return lines
+
+    root_items = _tree_items(directory)
+    if root_items is None:
+        return ["[Permission denied]"]
+
+    # One (items, prefix) frame per open directory; len(stack) is the depth
+    stack = [(root_items, "")]
+    size = 0
+    while stack and size <= max_chars:
+        items, prefix = stack[-1]
+        item = next(items, None)
+        if item is None:
+            stack.pop()
+            continue
+
+        entry, is_dir, is_last = item
         connector = "└── " if is_last else "├── "
 
         if is_dir:
-            lines.append(f"{prefix}{connector}{item.name}/")
-            extension = "    " if is_last else "│   "
-            _build_tree(item, lines, prefix + extension, max_depth, current_depth + 1)
+            lines.append(f"{prefix}{connector}{entry.name}/")
+            if len(stack) < max_depth:
+                child_prefix = prefix + ("    " if is_last else "│   ")
+                children = _tree_items(entry.path)
+                if children is None:
+                    lines.append(f"{child_prefix}[Permission denied]")
+                else:
+                    stack.append((children, child_prefix))
         else:
-            lines.append(f"{prefix}{connector}{item.name}")
+            lines.append(f"{prefix}{connector}{entry.name}")
+
+        size += len(lines[-1]) + 1
+
+    return lines
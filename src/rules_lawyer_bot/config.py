@@ -1,4 +1,6 @@
 """Application configuration using pydantic-settings."""
+from functools import lru_cache
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -49,6 +51,10 @@ class Settings(BaseSettings):
         default=4,
         description="Max concurrent ugrep processes"
     )
+    sgr_verbose: bool = Field(
+        default=False,
+        description="Generate stage_reasoning for all users (always on for admins)"
+    )
 
     # Logging
     log_level: str = Field(
@@ -84,14 +90,14 @@ class Settings(BaseSettings):
         return f"{self.data_path}/sessions"
 
     @property
-    def admin_ids(self) -> list[int]:
-        """Parse comma-separated admin user IDs into a list of integers."""
-        if not self.admin_user_ids or not self.admin_user_ids.strip():
-            return []
-        try:
-            return [int(uid.strip()) for uid in self.admin_user_ids.split(",") if uid.strip()]
-        except ValueError:
-            return []
+    def text_cache_dir(self) -> str:
+        """Directory for plain-text extractions of PDF rulebooks."""
+        return f"{self.data_path}/text_cache"
+
+    @property
+    def admin_ids(self) -> frozenset[int]:
+        """Admin user IDs parsed from the comma-separated setting (cached)."""
+        return _parse_admin_ids(self.admin_user_ids)
 
     @property
     def tracing_enabled(self) -> bool:
@@ -103,6 +109,24 @@ class Settings(BaseSettings):
         )
 
 
+@lru_cache(maxsize=8)
+def _parse_admin_ids(admin_user_ids: str) -> frozenset[int]:
+    """Parse comma-separated admin user IDs into a set of integers.
+
+    Cached per value: admin checks run on every message.
+
+    Args:
+        admin_user_ids: Setting value, e.g. "123, 456"
+
+    Returns:
+        Set of user IDs (empty if the value is empty or malformed)
+    """
+    try:
+        return frozenset(int(uid.strip()) for uid in admin_user_ids.split(",") if uid.strip())
+    except ValueError:
+        return frozenset()
+
+
 # Global settings instance
 try:
     settings = Settings()
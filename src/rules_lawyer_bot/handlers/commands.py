@@ -3,28 +3,18 @@
 Implements /start and /games commands.
 """
 
-from pathlib import Path
+from difflib import get_close_matches
 
 from telegram import Update
 from telegram.ext import ContextTypes
 
+from src.rules_lawyer_bot.agent.tools import library_game_keys
 from src.rules_lawyer_bot.config import settings
 from src.rules_lawyer_bot.utils.logger import logger
 from src.rules_lawyer_bot.utils.telegram_helpers import send_long_message
 
-
-async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle /start command.
-
-    Args:
-        update: Telegram update object
-        context: Telegram context
-    """
-    user = update.effective_user
-    logger.info(f"User {user.id} ({user.username}) started bot")
-
-    welcome_message = f"""
-Привет, {user.first_name}!
+# Formatted per user with name and rpm (requests per minute)
+_WELCOME_TEMPLATE = """Привет, {name}!
 
 Я — твой помощник по правилам настольных игр. Задавай любые вопросы о правилах!
 
@@ -40,10 +30,24 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
 **Советы:**
 - Названия игр лучше писать на английском (например, «Arkham Horror»)
 - Русский текст в рулбуках тоже ищу с учётом морфологии
-- Лимит: {settings.max_requests_per_minute} запросов в минуту
+- Лимит: {rpm} запросов в минуту
+
+Напиши свой вопрос!"""
+
+
+async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle /start command.
+
+    Args:
+        update: Telegram update object
+        context: Telegram context
+    """
+    user = update.effective_user
+    logger.info(f"User {user.id} ({user.username}) started bot")
 
-Напиши свой вопрос!
-""".strip()
+    welcome_message = _WELCOME_TEMPLATE.format(
+        name=user.first_name, rpm=settings.max_requests_per_minute
+    )
 
     await update.message.reply_text(welcome_message)
 
@@ -71,13 +75,14 @@ async def games_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     query = " ".join(context.args).strip() if context.args else ""
 
     try:
-        pdf_dir = Path(settings.pdf_storage_path)
-        if not pdf_dir.exists():
+        # Get all PDF filenames (without .pdf extension); the listing is
+        # cached and rescanned only when the library changes
+        try:
+            game_keys = library_game_keys()
+        except FileNotFoundError:
             await update.message.reply_text("⚠️ PDF library not found.")
             return
-
-        # Get all PDF filenames (without .pdf extension)
-        all_games = sorted([f.stem for f in pdf_dir.glob("*.pdf")])
+        all_games = [name for name, _ in game_keys]
 
         if not all_games:
             await update.message.reply_text("📚 The game library is currently empty.")
@@ -87,58 +92,64 @@ async def games_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         if query:
             query_lower = query.lower()
 
-            # Exact matches first, then partial matches
-            exact_matches = [g for g in all_games if query_lower == g.lower()]
-            partial_matches = [
-                g for g in all_games
-                if query_lower in g.lower() and g not in exact_matches
-            ]
+            # Exact matches first, then partial matches (one pass over the games)
+            exact_matches = []
+            partial_matches = []
+            for g, g_lower in game_keys:
+                if query_lower == g_lower:
+                    exact_matches.append(g)
+                elif query_lower in g_lower:
+                    partial_matches.append(g)
 
             matches = exact_matches + partial_matches
 
             if not matches:
-                # No matches found - show closest alternatives (top 3)
-                # Simple heuristic: count matching characters
-                def match_score(game: str) -> int:
-                    game_lower = game.lower()
-                    return sum(1 for c in query_lower if c in game_lower)
-
-                suggestions = sorted(all_games, key=match_score, reverse=True)[:3]
-
-                response = f"❌ Игра '{query}' не найдена.\n\n"
-                response += "💡 Возможно, вы имели в виду:\n"
-                for i, game in enumerate(suggestions, 1):
-                    response += f"{i}. 📖 {game}\n"
-                response += f"\n🎮 Всего игр в библиотеке: {len(all_games)}"
-                response += "\n\n💬 Используйте /games для просмотра всех игр"
+                # No matches found - show closest alternatives (top 3 by
+                # similarity ratio; cutoff=0 so there are always suggestions)
+                by_lower = {g_lower: g for g, g_lower in game_keys}
+                suggestions = [
+                    by_lower[g_lower]
+                    for g_lower in get_close_matches(query_lower, by_lower, n=3, cutoff=0)
+                ]
+
+                parts = [f"❌ Игра '{query}' не найдена.\n\n", "💡 Возможно, вы имели в виду:\n"]
+                parts.extend(f"{i}. 📖 {game}\n" for i, game in enumerate(suggestions, 1))
+                parts.append(f"\n🎮 Всего игр в библиотеке: {len(all_games)}")
+                parts.append("\n\n💬 Используйте /games для просмотра всех игр")
+                response = "".join(parts)
 
                 await update.message.reply_text(response)
                 return
 
             # Found matches - show them
             if len(matches) == 1:
-                response = f"✅ Найдена игра: *{matches[0]}*\n\n"
-                response += "💬 Можете задать любой вопрос о правилах этой игры!"
+                response = (
+                    f"✅ Найдена игра: *{matches[0]}*\n\n"
+                    "💬 Можете задать любой вопрос о правилах этой игры!"
+                )
             else:
-                response = f"🔍 Найдено игр: {len(matches)}\n\n"
-                for i, game in enumerate(matches[:10], 1):  # Show max 10
-                    response += f"{i}. 📖 {game}\n"
+                parts = [f"🔍 Найдено игр: {len(matches)}\n\n"]
+                parts.extend(  # Show max 10
+                    f"{i}. 📖 {game}\n" for i, game in enumerate(matches[:10], 1)
+                )
                 if len(matches) > 10:
-                    response += f"\n... и еще {len(matches) - 10} игр"
+                    parts.append(f"\n... и еще {len(matches) - 10} игр")
+                response = "".join(parts)
 
             await update.message.reply_text(response, parse_mode="Markdown")
             return
 
         # No query: show all games
-        response = f"🎮 *Доступные игры ({len(all_games)}):*\n\n"
-
-        for i, game in enumerate(all_games, 1):
-            response += f"{i}. 📖 {game}\n"
-
-        response += "\n💡 *Как задать вопрос:*\n"
-        response += 'Просто напишите: "Как работает движение в Dead Cells?"\n\n'
-        response += "🔍 *Поиск игры:*\n"
-        response += "Используйте /games <название> для поиска конкретной игры"
+        # Collect parts and join once: the list can be hundreds of games long
+        parts = [f"🎮 *Доступные игры ({len(all_games)}):*\n\n"]
+        parts.extend(f"{i}. 📖 {game}\n" for i, game in enumerate(all_games, 1))
+        parts.append(
+            "\n💡 *Как задать вопрос:*\n"
+            'Просто напишите: "Как работает движение в Dead Cells?"\n\n'
+            "🔍 *Поиск игры:*\n"
+            "Используйте /games <название> для поиска конкретной игры"
+        )
+        response = "".join(parts)
 
         await send_long_message(context.bot, update.effective_chat.id, response)
 
@@ -4,21 +4,30 @@ Implements the main message processing flow with multi-stage pipeline
 and streaming progress updates.
 """
 
+import asyncio
 import json
+import logging
 import re
+import time
 
 from agents import Runner
+from pydantic import ValidationError
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from src.rules_lawyer_bot.agent.definition import get_user_session, rules_agent
-from src.rules_lawyer_bot.agent.schemas import PipelineOutput
+from src.rules_lawyer_bot.agent.definition import (
+    get_agent,
+    get_user_lock,
+    get_user_session,
+)
+from src.rules_lawyer_bot.agent.router import build_direct_answer, classify
+from src.rules_lawyer_bot.agent.schemas import PipelineOutput, PipelineOutputSlim
 from src.rules_lawyer_bot.config import settings
 from src.rules_lawyer_bot.pipeline.handler import handle_pipeline_output
 from src.rules_lawyer_bot.pipeline.state import get_conversation_state
 from src.rules_lawyer_bot.utils.logger import logger
 from src.rules_lawyer_bot.utils.progress_reporter import ProgressReporter
-from src.rules_lawyer_bot.utils.safety import rate_limiter, ugrep_semaphore
+from src.rules_lawyer_bot.utils.safety import rate_limiter
 from src.rules_lawyer_bot.utils.telegram_helpers import send_long_message
 
 # Blocklist patterns to prevent prompt injection and off-topic abuse
@@ -67,6 +76,183 @@ def _check_blocklist(text: str) -> bool:
     return bool(_BLOCKLIST_REGEX.search(text))
 
 
+# Start of the answer text inside a streamed final_answer object
+_ANSWER_START = re.compile(r'"final_answer"\s*:\s*\{\s*"answer"\s*:\s*"')
+# Closing quote of a JSON string (not preceded by an odd number of backslashes)
+_STRING_END = re.compile(r'(?<!\\)(?:\\\\)*"')
+
+
+def _partial_answer(output_text: str) -> str | None:
+    """Extract the final answer text streamed so far.
+
+    Args:
+        output_text: JSON text streamed so far for the current model response
+
+    Returns:
+        Decoded (possibly incomplete) answer, or None if it hasn't started
+    """
+    match = _ANSWER_START.search(output_text)
+    if match is None:
+        return None
+
+    raw = output_text[match.end():]
+    end = _STRING_END.search(raw)
+    if end is not None:
+        raw = raw[:end.start()]
+
+    # The stream may stop inside an escape sequence (e.g. "\\u04"); drop it
+    for cut in range(6):
+        try:
+            return json.loads(f'"{raw[:len(raw) - cut]}"')
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+# Key of the last output field the pipeline handler uses (only
+# stage_reasoning, when in the schema, comes after it)
+_FINAL_ANSWER_KEY = re.compile(r'"final_answer"\s*:')
+# Streamed text kept for the key search when a key is split across deltas
+_KEY_OVERLAP = 32
+
+
+class _EarlyOutputParser:
+    """Watch a streamed PipelineOutput until its routing fields are complete.
+
+    Structured outputs emit fields in schema order and final_answer is the
+    last field the pipeline handler needs, so once its value (an object or
+    null) is closed the output can be sent without waiting for the rest of
+    the run: stage_reasoning with the full schema, the end of the stream with
+    the slim one. Every delta is scanned once: the key search resumes where
+    the previous one stopped and the value is walked incrementally.
+    """
+
+    def __init__(self):
+        """Start watching a new model response."""
+        self.text = ""
+        self._search_from = 0
+        self._value_pos: int | None = None
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._done = False
+
+    def feed(self, delta: str) -> PipelineOutput | None:
+        """Add a streamed delta.
+
+        Args:
+            delta: Next chunk of output JSON text
+
+        Returns:
+            PipelineOutput with empty stage_reasoning once the routing fields
+            are complete (returned only once), otherwise None
+        """
+        self.text += delta
+        if self._done:
+            return None
+
+        if self._value_pos is None:
+            match = _FINAL_ANSWER_KEY.search(self.text, self._search_from)
+            if match is None:
+                self._search_from = max(0, len(self.text) - _KEY_OVERLAP)
+                return None
+            self._value_pos = match.end()
+
+        end = self._scan_value()
+        if end is None:
+            return None
+
+        self._done = True
+        try:
+            return PipelineOutputSlim.model_validate_json(self.text[:end] + "}")
+        except ValidationError:
+            return None
+
+    def _scan_value(self) -> int | None:
+        """Continue scanning the final_answer value.
+
+        Returns:
+            Index just past the value, or None if it isn't complete yet
+        """
+        text = self.text
+        for i in range(self._value_pos, len(text)):
+            char = text[i]
+            if not self._started:
+                if char.isspace():
+                    continue
+                self._started = True
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{" or char == "[":
+                self._depth += 1
+            elif char == "}" or char == "]":
+                if self._depth == 0:
+                    return i  # End of the enclosing object after a literal
+                self._depth -= 1
+                if self._depth == 0:
+                    return i + 1
+            elif self._depth == 0 and (char == "," or char.isspace()):
+                return i  # End of a literal (null)
+        self._value_pos = len(text)
+        return None
+
+
+def _format_agent_steps(items: list) -> str:
+    """Describe the items of an agent run for the debug log.
+
+    Args:
+        items: RunResult.new_items
+
+    Returns:
+        Multi-line summary, one entry per step
+    """
+    lines = [f"Agent steps: {len(items)}"]
+    for i, step in enumerate(items, 1):
+        # Pretty-print structured outputs, show summary for others
+        if hasattr(step, "raw_item") and hasattr(step.raw_item, "content"):
+            # Extract just the text content from message outputs
+            content = step.raw_item.content
+            if isinstance(content, list) and len(content) > 0:
+                text_content = (
+                    content[0].text
+                    if hasattr(content[0], "text")
+                    else str(content[0])
+                )
+                # Pretty-print JSON if it's parseable
+                try:
+                    parsed = json.loads(text_content)
+                    lines.append(
+                        f"  Step {i}: {step.type}: "
+                        f"{step.raw_item.model_dump_json(indent=2, ensure_ascii=False)}"
+                    )
+                    lines.append(
+                        f"    Output (formatted):\n"
+                        f"{json.dumps(parsed, indent=2, ensure_ascii=False)}"
+                    )
+                except (json.JSONDecodeError, AttributeError):
+                    # Not JSON, log first 200 chars
+                    preview = (
+                        text_content[:200] + "..."
+                        if len(text_content) > 200
+                        else text_content
+                    )
+                    lines.append(f"  Step {i}: {step.type} - {preview}")
+            else:
+                lines.append(f"  Step {i}: {step.type}")
+        else:
+            # For other step types, show summary
+            lines.append(f"  Step {i}: {type(step).__name__}")
+    return "\n".join(lines)
+
+
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle all text messages using multi-stage pipeline.
 
@@ -114,6 +300,27 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         # Get conversation state
         conv_state = get_conversation_state(context, user.id)
 
+        # Game list / "do you have X?" are answered from the library, without the agent
+        route = classify(message_text)
+        if route.route != "rules":
+            direct = await asyncio.to_thread(build_direct_answer, route)
+            if direct is not None:
+                logger.info(f"[Router] {route.route} query answered without agent")
+                if direct.game:
+                    conv_state.reset_pending()
+                    conv_state.set_game(direct.game, direct.pdf_file)
+                # Record the exchange so follow-ups to the agent see it
+                async with get_user_lock(user.id):
+                    session = await get_user_session(user.id)
+                    await session.add_items([
+                        {"role": "user", "content": message_text},
+                        {"role": "assistant", "content": direct.text},
+                    ])
+                await send_long_message(
+                    bot=context.bot, chat_id=update.effective_chat.id, text=direct.text
+                )
+                return direct.text
+
         # Build context-aware input for agent
         agent_input = message_text
 
@@ -136,28 +343,70 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         # Create progress reporter for streaming updates
         progress = ProgressReporter(context.bot, update.effective_chat.id)
 
+        # Output parsed from the stream and sent before the run finished
+        early_output: PipelineOutput | None = None
+
+        # Admins see the reasoning trace, so their runs keep stage_reasoning
+        # and wait for the complete output
+        is_admin = user.id in settings.admin_ids
+
         try:
-            # Get user-specific session
-            logger.debug(f"[Perf] Getting session for user {user.id}")
-            session = get_user_session(user.id)
-            logger.debug("[Perf] Session loaded, starting agent run")
-
-            # Run agent with streaming to show progress
-            async with ugrep_semaphore:
-                logger.debug("[Perf] Acquired ugrep semaphore, calling Runner.run_streamed")
+            # One run per user at a time: a second message waits for the first
+            # to finish so both don't read/append the same history concurrently
+            async with get_user_lock(user.id):
+                # Get user-specific session
+                logger.debug(f"[Perf] Getting session for user {user.id}")
+                session = await get_user_session(user.id)
+                logger.debug("[Perf] Session loaded, starting agent run")
+
+                # Run agent with streaming to show progress
+                # (ugrep concurrency is limited per search inside the tools, not per run,
+                # so parallel tool calls of one run are not starved by other runs)
                 result = Runner.run_streamed(
-                    starting_agent=rules_agent, input=agent_input, session=session
+                    starting_agent=get_agent(verbose=settings.sgr_verbose or is_admin),
+                    input=agent_input,
+                    session=session,
                 )
                 logger.debug("[Perf] Runner.run_streamed returned, waiting for first event")
 
                 # Process streaming events
                 event_count = 0
+                output_stream = _EarlyOutputParser()
+                # The preview is edited at most every preview_update_interval,
+                # so the streamed text is only re-parsed for it that often
+                next_preview_at = 0.0
                 async for event in result.stream_events():
                     event_count += 1
                     if event_count == 1:
                         logger.debug(f"[Perf] First event received: {event.type}")
 
-                    if event.type == "run_item_stream_event":
+                    if event.type == "raw_response_event":
+                        # Answer as soon as the streamed output is actionable,
+                        # before the model finishes the rest of the run
+                        if early_output is not None:
+                            continue
+                        if event.data.type == "response.created":
+                            output_stream = _EarlyOutputParser()
+                        elif event.data.type == "response.output_text.delta":
+                            parsed = output_stream.feed(event.data.delta)
+                            if not is_admin:
+                                early_output = parsed
+                            now = time.monotonic()
+                            if early_output is None and now >= next_preview_at:
+                                next_preview_at = now + progress.preview_update_interval
+                                preview = _partial_answer(output_stream.text)
+                                if preview:
+                                    await progress.report_answer_preview(preview)
+                            if early_output is not None:
+                                logger.debug(
+                                    f"[Perf] Early dispatch: {early_output.action_type.value}"
+                                )
+                                await progress.finalize()
+                                await handle_pipeline_output(
+                                    early_output, update, context, user.id
+                                )
+
+                    elif event.type == "run_item_stream_event":
                         item = event.item
                         if item.type == "tool_call_item":
                             # Extract tool name and arguments
@@ -177,49 +426,24 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
                             await progress.report_tool_call(tool_name, args)
                             logger.debug(f"Tool called: {tool_name}")
 
-            # Force final update before response
-            await progress.force_update()
-
-            # Log execution details
-            logger.debug(f"Agent steps: {len(result.new_items)}")
-            for i, step in enumerate(result.new_items, 1):
-                # Pretty-print structured outputs, show summary for others
-                if hasattr(step, "raw_item") and hasattr(step.raw_item, "content"):
-                    # Extract just the text content from message outputs
-                    content = step.raw_item.content
-                    if isinstance(content, list) and len(content) > 0:
-                        text_content = (
-                            content[0].text
-                            if hasattr(content[0], "text")
-                            else str(content[0])
-                        )
-                        # Pretty-print JSON if it's parseable
-                        try:
-                            parsed = json.loads(text_content)
-                            logger.debug(
-                                f"  Step {i}: {step.type}: "
-                                f"{step.raw_item.model_dump_json(indent=2, ensure_ascii=False)}"
-                            )
-                            logger.debug(
-                                f"    Output (formatted):\n"
-                                f"{json.dumps(parsed, indent=2, ensure_ascii=False)}"
-                            )
-                        except (json.JSONDecodeError, AttributeError):
-                            # Not JSON, log first 200 chars
-                            preview = (
-                                text_content[:200] + "..."
-                                if len(text_content) > 200
-                                else text_content
-                            )
-                            logger.debug(f"  Step {i}: {step.type} - {preview}")
-                    else:
-                        logger.debug(f"  Step {i}: {step.type}")
-                else:
-                    # For other step types, show summary
-                    logger.debug(f"  Step {i}: {type(step).__name__}")
+            # Force final update before response (unless already answered)
+            if early_output is None:
+                await progress.force_update()
+
+            # Log execution details (formatting every step is costly, so
+            # only when debug logging is on, as one record)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(_format_agent_steps(result.new_items))
 
             # Handle multi-stage pipeline output
             if isinstance(result.final_output, PipelineOutput):
+                if early_output is not None:
+                    # Already sent from the streamed output
+                    logger.debug(
+                        f"[Pipeline] stage_reasoning: {result.final_output.stage_reasoning}"
+                    )
+                    return result.final_output.model_dump_json(ensure_ascii=False)
+
                 # Delete progress message before sending response
                 await progress.finalize()
                 await handle_pipeline_output(
@@ -251,6 +475,10 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             await progress.finalize()
             logger.exception(f"Error handling message from user {user.id}")
 
+            if early_output is not None:
+                # User already got the answer; don't follow it with an error
+                return f"Error: {e}"
+
             error_message = (
                 "❌ An error occurred while processing your request. "
                 "Please try again or contact support."
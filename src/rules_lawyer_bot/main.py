@@ -58,11 +58,26 @@ def main() -> None:
     # Build application
     application = ApplicationBuilder().token(settings.telegram_token).build()
 
-    # Register post-shutdown callback to flush Langfuse traces
+    # Pre-extract PDF text in the background so first searches hit the cache
+    async def on_startup(app: Application) -> None:
+        """Start warming the PDF text cache."""
+        from src.rules_lawyer_bot.agent.tools import warm_text_cache
+
+        app.bot_data["text_cache_warmup"] = asyncio.create_task(warm_text_cache())
+
+    application.post_init = on_startup
+
+    # Register post-shutdown callback to flush sessions and Langfuse traces
     async def on_shutdown(app: Application) -> None:
-        """Flush Langfuse traces on application shutdown."""
+        """Flush pending session writes and Langfuse traces on shutdown."""
+        from src.rules_lawyer_bot.agent.session import (
+            close_session_connections,
+            flush_all_sessions,
+        )
         from src.rules_lawyer_bot.utils.observability import shutdown_langfuse
 
+        await flush_all_sessions()
+        close_session_connections()
         shutdown_langfuse()
 
     application.post_shutdown = on_shutdown
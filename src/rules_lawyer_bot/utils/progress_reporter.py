@@ -66,6 +66,9 @@ FALLBACK_STATUSES = [
     "☠️ Некромант поднимает... процессы...",
 ]
 
+# Telegram message limit is 4096 characters; leave room for the ellipsis
+MAX_PREVIEW_LENGTH = 4000
+
 class ProgressReporter:
     """Manages progress message updates during streaming agent execution.
 
@@ -78,6 +81,7 @@ class ProgressReporter:
         bot: Bot,
         chat_id: int,
         min_update_interval: float = 1.0,
+        preview_update_interval: float = 0.5,
     ):
         """Initialize progress reporter.
 
@@ -85,10 +89,12 @@ class ProgressReporter:
             bot: Telegram bot instance
             chat_id: Chat ID to send messages to
             min_update_interval: Minimum seconds between message updates (debounce)
+            preview_update_interval: Minimum seconds between answer preview updates
         """
         self.bot = bot
         self.chat_id = chat_id
         self.min_update_interval = min_update_interval
+        self.preview_update_interval = preview_update_interval
 
         self.progress_message: Optional[Message] = None
         self.current_status: str = ""
@@ -165,12 +171,32 @@ class ProgressReporter:
                 self.current_status = f"{self.current_status} ✗"
             await self._update_message()
 
-    async def _update_message(self) -> None:
-        """Update or create the progress message with debouncing."""
+    async def report_answer_preview(self, text: str) -> None:
+        """Show the answer while it is still being generated.
+
+        The preview replaces the tool status and is removed by finalize()
+        once the complete answer has been sent.
+
+        Args:
+            text: Answer text streamed so far
+        """
+        if len(text) > MAX_PREVIEW_LENGTH:
+            text = text[:MAX_PREVIEW_LENGTH] + "…"
+        self.current_status = text
+        await self._update_message(self.preview_update_interval)
+
+    async def _update_message(self, min_interval: Optional[float] = None) -> None:
+        """Update or create the progress message with debouncing.
+
+        Args:
+            min_interval: Debounce interval override (default: min_update_interval)
+        """
         current_time = time.time()
+        if min_interval is None:
+            min_interval = self.min_update_interval
 
         # Skip update if too soon (debounce)
-        if current_time - self.last_update_time < self.min_update_interval:
+        if current_time - self.last_update_time < min_interval:
             return
 
         status_text = self._format_status()
@@ -0,0 +1,61 @@
+"""Unit tests for the in-memory rulebook index."""
+from pathlib import Path
+
+from src.rules_lawyer_bot.agent.index import FileIndex, RulesIndex, parse_query
+
+
+def test_parse_query_boolean_terms():
+    """Test that AND/OR/NOT terms are parsed and regex queries are rejected."""
+    assert parse_query("move|ход jump -ranged") == ([["move", "ход"], ["jump"]], ["ranged"])
+    assert parse_query('"end of turn"') is None
+    assert parse_query("mov.*") is None
+    assert parse_query("-ranged") is None
+
+
+def test_parse_query_rejects_spelled_out_operators():
+    """Test that AND/OR/NOT words fall back to ugrep instead of literal roots."""
+    assert parse_query("move AND jump") is None
+    assert parse_query("move OR jump") is None
+    assert parse_query("move NOT ranged") is None
+    assert parse_query("move|OR jump") is None
+
+
+def test_file_index_matches_substrings_like_ugrep():
+    """Test case-insensitive substring matching with AND and NOT."""
+    index = FileIndex("Атака ближнего боя\nRanged attack\nДвижение\nMelee attack rules\n")
+
+    assert index.search([["атак", "attack"]], []) == [0, 1, 3]
+    assert index.search([["attack"], ["rules"]], []) == [3]
+    assert index.search([["attack"]], ["ranged"]) == [3]
+    assert index.search([["teleport"]], []) == []
+
+    # Repeated roots are served from the memoized scan
+    assert index.lines_matching("ATTACK") == {1, 3}
+    assert index.lines_matching("attack") == {1, 3}
+
+
+def test_file_index_render_merges_context():
+    """Test that overlapping context windows are merged and groups separated."""
+    index = FileIndex("\n".join(f"line {i}" for i in range(10)))
+
+    assert index.render([1, 2], context=1) == "line 0\nline 1\nline 2\nline 3"
+    assert index.render([0, 8], context=1) == "line 0\nline 1\n--\nline 7\nline 8\nline 9"
+
+
+def test_rules_index_rebuilds_on_change(tmp_path: Path):
+    """Test that a modified text file is re-indexed."""
+    import os
+
+    text_path = tmp_path / "Root.pdf"
+    text_path.write_text("move\n", encoding="utf-8")
+    rules_index = RulesIndex()
+
+    assert rules_index.search(text_path, "move") == "move"
+    assert rules_index.search(text_path, '"move"') is None
+
+    text_path.write_text("attack\n", encoding="utf-8")
+    stat = text_path.stat()
+    os.utime(text_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert rules_index.search(text_path, "move") == ""
+    assert rules_index.search(text_path, "attack") == "attack"
@@ -144,6 +144,245 @@ async def test_pipeline_output_clarification_needed():
         assert "Which game" in call_args[0][0]
 
 
+@pytest.mark.asyncio
+async def test_pipeline_output_dispatched_before_stream_ends():
+    """Test that a streamed output is sent once its fields before stage_reasoning arrive."""
+    from types import SimpleNamespace
+
+    from src.rules_lawyer_bot.agent.schemas import ClarificationRequest
+
+    mock_update = MagicMock()
+    mock_update.effective_user.id = 54321
+    mock_update.effective_user.username = "testuser"
+    mock_update.message.text = "How does movement work?"
+    mock_update.effective_chat.id = 54321
+    mock_update.message.reply_text = AsyncMock()
+
+    mock_context = MagicMock()
+    mock_context.bot.send_chat_action = AsyncMock()
+    mock_context.bot.send_message = AsyncMock()
+    mock_context.user_data = {}
+
+    pipeline_output = PipelineOutput(
+        action_type=ActionType.CLARIFICATION_NEEDED,
+        clarification=ClarificationRequest(
+            question="Which game are you asking about?",
+            context="No game specified",
+        ),
+        stage_reasoning="Game not specified in question",
+    )
+    output_json = pipeline_output.model_dump_json()
+    split_at = output_json.index('"stage_reasoning"') + len('"stage_reasoning"')
+    sent_before_end = []
+
+    mock_result = create_mock_streaming_result(final_output=pipeline_output)
+
+    async def stream_events():
+        yield SimpleNamespace(
+            type="raw_response_event", data=SimpleNamespace(type="response.created")
+        )
+        for chunk in (output_json[:split_at], output_json[split_at:]):
+            yield SimpleNamespace(
+                type="raw_response_event",
+                data=SimpleNamespace(type="response.output_text.delta", delta=chunk),
+            )
+            sent_before_end.append(mock_update.message.reply_text.call_count)
+
+    mock_result.stream_events = stream_events
+
+    with patch("src.rules_lawyer_bot.handlers.messages.Runner.run_streamed", return_value=mock_result):
+        await handle_message(mock_update, mock_context)
+
+    # Sent right after the first chunk, and not again after the run finished
+    assert sent_before_end == [1, 1]
+    mock_update.message.reply_text.assert_called_once()
+    assert "Which game" in mock_update.message.reply_text.call_args[0][0]
+
+
+@pytest.mark.asyncio
+async def test_default_slim_agent_output_dispatched_before_stream_ends():
+    """Test that a regular user's run uses the slim schema and still dispatches early."""
+    from types import SimpleNamespace
+
+    from src.rules_lawyer_bot.agent.schemas import PipelineOutputSlim
+
+    mock_update = MagicMock()
+    mock_update.effective_user.id = 67890
+    mock_update.effective_user.username = "testuser"
+    mock_update.message.text = "How does combat work in Gloomhaven?"
+    mock_update.effective_chat.id = 67890
+    mock_update.message.reply_text = AsyncMock()
+
+    mock_context = MagicMock()
+    mock_context.bot.send_chat_action = AsyncMock()
+    mock_context.bot.send_message = AsyncMock()
+    mock_context.user_data = {}
+
+    pipeline_output = PipelineOutputSlim(
+        action_type=ActionType.FINAL_ANSWER,
+        final_answer=FinalAnswer(answer="Attack with your cards.", confidence=0.9),
+    )
+    output_json = pipeline_output.model_dump_json(exclude={"stage_reasoning"})
+    sent_before_end = []
+
+    mock_result = create_mock_streaming_result(final_output=pipeline_output)
+
+    async def stream_events():
+        yield SimpleNamespace(
+            type="raw_response_event", data=SimpleNamespace(type="response.created")
+        )
+        for chunk in (output_json[:40], output_json[40:]):
+            yield SimpleNamespace(
+                type="raw_response_event",
+                data=SimpleNamespace(type="response.output_text.delta", delta=chunk),
+            )
+            sent_before_end.append(mock_send.await_count)
+        yield SimpleNamespace(
+            type="raw_response_event", data=SimpleNamespace(type="response.completed")
+        )
+
+    mock_result.stream_events = stream_events
+
+    with patch(
+        "src.rules_lawyer_bot.handlers.messages.Runner.run_streamed", return_value=mock_result
+    ) as mock_run:
+        with patch(
+            "src.rules_lawyer_bot.pipeline.handler.send_long_message", new_callable=AsyncMock
+        ) as mock_send:
+            await handle_message(mock_update, mock_context)
+
+    agent = mock_run.call_args.kwargs["starting_agent"]
+    assert agent.output_type.output_type is PipelineOutputSlim
+    # Sent as soon as final_answer closed, before the stream ended, and only once
+    assert sent_before_end == [0, 1]
+    mock_send.assert_awaited_once()
+    assert "Attack with your cards." in mock_send.call_args.kwargs["text"]
+
+
+@pytest.mark.asyncio
+async def test_answer_preview_parsed_at_preview_interval():
+    """Test that the streamed answer isn't re-parsed for the preview on every delta."""
+    from types import SimpleNamespace
+
+    from src.rules_lawyer_bot.agent.schemas import PipelineOutputSlim
+    from src.rules_lawyer_bot.handlers import messages
+
+    mock_update = MagicMock()
+    mock_update.effective_user.id = 67891
+    mock_update.effective_user.username = "testuser"
+    mock_update.message.text = "How does combat work in Gloomhaven?"
+    mock_update.effective_chat.id = 67891
+    mock_update.message.reply_text = AsyncMock()
+
+    mock_context = MagicMock()
+    mock_context.bot.send_chat_action = AsyncMock()
+    mock_context.bot.send_message = AsyncMock()
+    mock_context.user_data = {}
+
+    pipeline_output = PipelineOutputSlim(
+        action_type=ActionType.FINAL_ANSWER,
+        final_answer=FinalAnswer(answer="Attack with your cards. " * 20, confidence=0.9),
+    )
+    output_json = pipeline_output.model_dump_json(exclude={"stage_reasoning"})
+    mock_result = create_mock_streaming_result(final_output=pipeline_output)
+
+    async def stream_events():
+        yield SimpleNamespace(
+            type="raw_response_event", data=SimpleNamespace(type="response.created")
+        )
+        for char in output_json:
+            yield SimpleNamespace(
+                type="raw_response_event",
+                data=SimpleNamespace(type="response.output_text.delta", delta=char),
+            )
+
+    mock_result.stream_events = stream_events
+
+    with patch(
+        "src.rules_lawyer_bot.handlers.messages.Runner.run_streamed", return_value=mock_result
+    ):
+        with patch(
+            "src.rules_lawyer_bot.pipeline.handler.send_long_message", new_callable=AsyncMock
+        ):
+            with patch.object(
+                messages, "_partial_answer", wraps=messages._partial_answer
+            ) as mock_partial:
+                await handle_message(mock_update, mock_context)
+
+    # Hundreds of deltas arrive within one preview interval
+    assert 1 <= mock_partial.call_count < 5
+
+
+def test_early_output_parser_waits_for_final_answer():
+    """Test that the stream is parsed once final_answer closes, for both schemas."""
+    from src.rules_lawyer_bot.handlers.messages import _EarlyOutputParser
+
+    head = '{"action_type":"final_answer","game_identification":null,"clarification":null,'
+    answer = '"search_progress":null,"final_answer":{"answer":"Ход \\"по} {","confidence":0.9,'
+    tail = '"limitations":[],"suggestions":[]}'
+
+    # Slim schema: final_answer is the last field; key split across deltas
+    parser = _EarlyOutputParser()
+    assert parser.feed(head + answer[:30]) is None
+    assert parser.feed(answer[30:] + tail[:-1]) is None
+    output = parser.feed(tail[-1:])
+    assert output.final_answer.answer == 'Ход "по} {'
+    assert parser.feed("}") is None  # Sent only once
+
+    # Full schema: a null final_answer is complete at the next comma
+    parser = _EarlyOutputParser()
+    output = parser.feed(
+        '{"action_type":"clarification_needed","game_identification":null,'
+        '"clarification":null,"search_progress":null,"final_answer":null,"stage_'
+    )
+    assert output.action_type == ActionType.CLARIFICATION_NEEDED
+
+
+def test_slim_pipeline_output_omits_stage_reasoning():
+    """Test that the slim schema drops stage_reasoning but still validates."""
+    from src.rules_lawyer_bot.agent.schemas import PipelineOutputSlim
+
+    schema = PipelineOutputSlim.model_json_schema()
+    assert "stage_reasoning" not in schema["properties"]
+    assert "stage_reasoning" in PipelineOutput.model_json_schema()["properties"]
+
+    output = PipelineOutputSlim.model_validate_json(
+        '{"action_type": "final_answer", "final_answer": {"answer": "Yes"}}'
+    )
+    assert isinstance(output, PipelineOutput)
+    assert output.stage_reasoning == ""
+
+
+def test_partial_answer_decodes_streamed_prefix():
+    """Test that the answer text is extracted from incomplete output JSON."""
+    from src.rules_lawyer_bot.handlers.messages import _partial_answer
+
+    head = '{"action_type":"final_answer","game_identification":null,"final_answer":{"answer":"'
+
+    assert _partial_answer('{"action_type":"final_answer"') is None
+    assert _partial_answer(head) == ""
+    assert _partial_answer(head + 'Ход \\"по') == 'Ход "по'
+    assert _partial_answer(head + "Line 1\\nLine 2\\u04") == "Line 1\nLine 2"
+    assert _partial_answer(head + 'Done.", "confidence": 0.9') == "Done."
+
+
+def test_format_agent_steps_builds_one_record():
+    """Test that agent steps are summarized in a single multi-line log message."""
+    from src.rules_lawyer_bot.handlers.messages import _format_agent_steps
+
+    message = MagicMock(type="message_output_item")
+    message.raw_item.content = [MagicMock(text="plain answer")]
+    tool_call = object()
+
+    summary = _format_agent_steps([message, tool_call])
+
+    assert summary.splitlines() == [
+        "Agent steps: 2",
+        "  Step 1: message_output_item - plain answer",
+        "  Step 2: object",
+    ]
+
+
 @pytest.mark.asyncio
 async def test_blocklist_prompt_injection():
     """Test that prompt injection attempts are blocked."""
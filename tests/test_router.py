@@ -0,0 +1,82 @@
+"""Unit tests for the deterministic query router."""
+import pytest
+from pathlib import Path
+
+from src.rules_lawyer_bot.agent.router import RouteResult, build_direct_answer, classify
+from src.rules_lawyer_bot.config import settings
+
+
+@pytest.mark.parametrize(
+    "question, language",
+    [
+        ("Какие игры у тебя есть?", "ru"),
+        ("покажи список игр", "ru"),
+        ("What games do you have?", "en"),
+        ("Show me all games", "en"),
+    ],
+)
+def test_classify_discovery(question, language):
+    """Test that game list requests are routed as discovery."""
+    assert classify(question) == RouteResult("discovery", language)
+
+
+@pytest.mark.parametrize(
+    "question, language, game",
+    [
+        ("Есть ли у тебя Wingspan?", "ru", "Wingspan"),
+        ("у вас есть правила для Root?", "ru", "Root"),
+        ("Do you have Dead Cells?", "en", "Dead Cells"),
+    ],
+)
+def test_classify_existence(question, language, game):
+    """Test that "do you have X?" questions are routed with the game name."""
+    assert classify(question) == RouteResult("existence", language, game)
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "Как работает движение в Gloomhaven?",
+        "Какие игры можно играть вдвоём в Root?",
+        "How does combat work?",
+    ],
+)
+def test_classify_rules(question):
+    """Test that rules questions go to the agent."""
+    assert classify(question).route == "rules"
+
+
+def test_direct_answer_existence(mock_settings):
+    """Test that found games are confirmed and unknown ones go to the agent."""
+    pdf_dir = Path(settings.pdf_storage_path)
+    for name in ["Dead Cells.pdf", "Root.pdf"]:
+        (pdf_dir / name).write_bytes(b"%PDF-1.4")
+
+    answer = build_direct_answer(classify("Do you have Dead Cells?"))
+    assert answer.game == "Dead Cells"
+    assert answer.pdf_file == "Dead Cells.pdf"
+
+    # Not found by filename, or a rules question in disguise: handled by the agent
+    assert build_direct_answer(classify("Есть ли у тебя Мёртвые клетки?")) is None
+    assert build_direct_answer(classify("Do you have to discard cards in Root?")) is None
+
+
+def test_direct_answer_existence_several_matches(mock_settings):
+    """Test that ambiguous names go to the agent's game selection."""
+    pdf_dir = Path(settings.pdf_storage_path)
+    for name in ["Root Underworld.pdf", "Root Marauder.pdf"]:
+        (pdf_dir / name).write_bytes(b"%PDF-1.4")
+
+    assert build_direct_answer(classify("Do you have Root?")) is None
+
+
+def test_direct_answer_discovery(mock_settings):
+    """Test that the game list is built from the library."""
+    pdf_dir = Path(settings.pdf_storage_path)
+    for name in ["Azul.pdf", "Root.pdf"]:
+        (pdf_dir / name).write_bytes(b"%PDF-1.4")
+
+    answer = build_direct_answer(classify("What games do you have?"))
+
+    assert "1. Azul\n2. Root" in answer.text
+    assert answer.game is None
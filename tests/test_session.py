@@ -0,0 +1,160 @@
+"""Unit tests for the ring-buffered conversation session."""
+import asyncio
+import os
+import pytest
+from pathlib import Path
+
+from agents import SQLiteSession
+
+from src.rules_lawyer_bot.agent.session import (
+    RingSession,
+    TunedSQLiteSession,
+    _shared_connections,
+    close_session_connections,
+)
+
+
+def _user(text: str) -> dict:
+    return {"role": "user", "content": text}
+
+
+def _assistant(text: str) -> dict:
+    return {"role": "assistant", "content": text}
+
+
+@pytest.mark.asyncio
+async def test_ring_session_batches_writes(tmp_path: Path):
+    """Test that items are readable at once and persisted after the flush delay."""
+    store = SQLiteSession("conversation_1", str(tmp_path / "sessions.db"))
+    session = RingSession(store, flush_delay=0.01)
+
+    await session.add_items([_user("hi")])
+    await session.add_items([_assistant("hello")])
+
+    assert await session.get_items() == [_user("hi"), _assistant("hello")]
+    assert await store.get_items() == []
+
+    await asyncio.sleep(0.05)
+    assert await store.get_items() == [_user("hi"), _assistant("hello")]
+
+
+@pytest.mark.asyncio
+async def test_ring_session_keeps_recent_items_from_user_message(tmp_path: Path):
+    """Test that the ring is bounded and history starts at a user message."""
+    store = SQLiteSession("conversation_1", str(tmp_path / "sessions.db"))
+    session = RingSession(store, max_items=3)
+
+    await session.add_items([_user("q1"), _assistant("a1"), _user("q2"), _assistant("a2")])
+
+    # Ring holds a1, q2, a2; the orphaned a1 is not replayed
+    assert await session.get_items() == [_user("q2"), _assistant("a2")]
+
+    await session.flush()
+    assert len(await store.get_items()) == 4
+
+
+@pytest.mark.asyncio
+async def test_ring_session_loads_history_from_store(tmp_path: Path):
+    """Test that a new ring session starts from persisted history."""
+    store = SQLiteSession("conversation_1", str(tmp_path / "sessions.db"))
+    await store.add_items([_user("q1"), _assistant("a1")])
+
+    session = RingSession(store)
+
+    assert await session.get_items() == [_user("q1"), _assistant("a1")]
+    assert await session.pop_item() == _assistant("a1")
+    assert await store.get_items() == [_user("q1")]
+
+
+@pytest.mark.asyncio
+async def test_tuned_sqlite_session_sets_pragmas(tmp_path: Path):
+    """Test that session connections use WAL with synchronous=NORMAL."""
+    store = TunedSQLiteSession("conversation_1", str(tmp_path / "sessions.db"))
+    await store.add_items([_user("hi")])
+
+    conn = store._get_connection()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert await store.get_items() == [_user("hi")]
+
+
+@pytest.mark.asyncio
+async def test_tuned_sqlite_session_pragmas_reach_sdk_connections(tmp_path: Path, monkeypatch):
+    """Test that the connections the SDK itself uses are tuned.
+
+    The pragmas hook into SQLiteSession._get_connection, which is private;
+    this fails if an SDK upgrade stops routing its queries through it.
+    """
+    used = []
+    original = TunedSQLiteSession._get_connection
+
+    def spy(self):
+        conn = original(self)
+        used.append(conn)
+        return conn
+
+    monkeypatch.setattr(TunedSQLiteSession, "_get_connection", spy)
+    store = TunedSQLiteSession("conversation_1", str(tmp_path / "sessions.db"))
+    await store.add_items([_user("hi")])  # Runs on a worker thread
+    assert await store.get_items() == [_user("hi")]
+
+    assert used
+    for conn in used:
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA mmap_size").fetchone()[0] > 0
+
+    # Tuned once: getting the connection again runs no pragmas
+    statements = []
+    store._get_connection().set_trace_callback(statements.append)
+    store._get_connection()
+    assert statements == []
+
+
+@pytest.mark.asyncio
+async def test_tuned_sqlite_sessions_share_connections(tmp_path: Path):
+    """Test that many sessions don't open connections of their own."""
+    db_path = str(tmp_path / "sessions.db")
+    stores = [TunedSQLiteSession(f"conversation_{i}", db_path) for i in range(64)]
+    await asyncio.gather(*(store.add_items([_user(store.session_id)]) for store in stores))
+
+    # One connection per worker thread, whatever the number of sessions
+    assert stores[0]._get_connection() is stores[1]._get_connection()
+    assert len(_shared_connections(db_path)._opened) <= min(32, (os.cpu_count() or 1) + 4) + 1
+
+    stores[0].close()  # Leaves the shared connections to the other sessions
+    assert await stores[1].get_items() == [_user("conversation_1")]
+
+    close_session_connections()
+    assert _shared_connections(db_path)._opened == []
+    assert await stores[1].get_items() == [_user("conversation_1")]
+
+
+@pytest.mark.asyncio
+async def test_user_session_eviction_flushes_pending_writes(mock_settings, monkeypatch):
+    """Test that a user's next session sees items still pending when evicted."""
+    from src.rules_lawyer_bot.agent import definition
+
+    monkeypatch.setattr(definition, "_USER_SESSIONS_MAX_SIZE", 1)
+    monkeypatch.setattr(definition, "_user_sessions", definition.OrderedDict())
+
+    first = await definition.get_user_session(1)
+    await first.add_items([_user("q1"), _assistant("a1")])  # Flush timer still pending
+
+    await definition.get_user_session(2)  # Evicts user 1
+    again = await definition.get_user_session(1)
+
+    assert again is not first
+    assert await again.get_items() == [_user("q1"), _assistant("a1")]
+
+
+@pytest.mark.asyncio
+async def test_user_lock_shared_while_in_use_and_dropped_after(mock_settings):
+    """Test that per-user locks don't accumulate once runs finish."""
+    from src.rules_lawyer_bot.agent import definition
+
+    lock = definition.get_user_lock(1)
+    async with lock:
+        assert definition.get_user_lock(1) is lock
+
+    del lock
+    assert 1 not in definition._user_locks
@@ -4,6 +4,7 @@ Note: We import the internal implementation functions directly
 since the exported versions are wrapped with @function_tool decorator.
 """
 import asyncio
+import json
 import pytest
 from pathlib import Path
 from pypdf import PdfReader
@@ -90,6 +91,20 @@ async def test_search_filenames_success(mock_settings, tmp_path):
     assert "Gloomhaven.pdf" in result
 
 
+def test_match_filenames_uses_trigrams(mock_settings):
+    """Test filename matching for long (trigram) and short (scan) queries."""
+    from src.rules_lawyer_bot.agent import tools
+
+    pdf_dir = Path(mock_settings.pdf_storage_path)
+    for name in ["Gloomhaven.pdf", "Frosthaven.pdf", "Arkham Horror.pdf"]:
+        (pdf_dir / name).touch()
+
+    assert tools._match_filenames("haven") == ["Frosthaven.pdf", "Gloomhaven.pdf"]
+    assert tools._match_filenames("arkham h") == ["Arkham Horror.pdf"]
+    assert tools._match_filenames("ha") == ["Arkham Horror.pdf", "Frosthaven.pdf", "Gloomhaven.pdf"]
+    assert tools._match_filenames("wingspan") == []
+
+
 @pytest.mark.asyncio
 async def test_search_filenames_no_match(mock_settings):
     """Test filename search with no matches."""
@@ -177,6 +192,58 @@ def _build_tree_for_test(
             lines.append(f"{prefix}{connector}{item.name}")
 
 
+def test_read_cached_text_marks_pages(tmp_path):
+    """Test that a pdftotext extraction is split into pages at form feeds."""
+    from src.rules_lawyer_bot.agent import tools
+
+    text_path = tmp_path / "game.pdf"
+    text_path.write_text("setup rules\n\fscoring rules\n\f", encoding="utf-8")
+
+    result = tools._read_cached_text(text_path)
+
+    assert result == "--- Page 1 ---\n\nsetup rules\n\n--- Page 2 ---\n\nscoring rules\n"
+
+
+def test_extract_full_text_stops_at_limit(tmp_path, monkeypatch):
+    """Test that full-document extraction stops once the limit is reached."""
+    from pypdf import PdfWriter
+
+    from src.rules_lawyer_bot.agent import tools
+
+    writer = PdfWriter()
+    for _ in range(50):
+        writer.add_blank_page(width=200, height=200)
+    pdf_path = tmp_path / "long.pdf"
+    with open(pdf_path, "wb") as f:
+        writer.write(f)
+
+    monkeypatch.setattr(tools, "_FULL_TEXT_LIMIT", 40)
+    result = tools._extract_full_text(str(pdf_path), 1)
+
+    assert result.startswith("--- Page 1 ---")
+    assert "--- Page 4 ---" not in result
+    assert result.endswith("...(truncated at 100k chars)")
+
+
+def test_extract_full_text_uses_pool_for_long_pdfs(tmp_path, monkeypatch):
+    """Test that long PDFs are extracted in page chunks, in page order."""
+    from pypdf import PdfWriter
+
+    from src.rules_lawyer_bot.agent import tools
+
+    writer = PdfWriter()
+    for _ in range(40):
+        writer.add_blank_page(width=200, height=200)
+    pdf_path = tmp_path / "long.pdf"
+    with open(pdf_path, "wb") as f:
+        writer.write(f)
+
+    result = tools._extract_full_text(str(pdf_path), 1)
+
+    pages = [line for line in result.splitlines() if line.startswith("--- Page")]
+    assert pages == [f"--- Page {n} ---" for n in range(1, 41)]
+
+
 @pytest.mark.asyncio
 async def test_list_directory_tree_empty(mock_settings):
     """Test tree on empty directory."""
@@ -260,6 +327,38 @@ async def test_list_directory_tree_ignores_non_pdf(mock_settings):
     assert "image.png" not in result
 
 
+def test_build_tree_lists_directories_first(mock_settings):
+    """Test that the real tree builder lists folders before PDFs, by name."""
+    from src.rules_lawyer_bot.agent.tools import _build_tree
+
+    pdf_dir = Path(mock_settings.pdf_storage_path)
+    (pdf_dir / "zombies").mkdir()
+    (pdf_dir / "zombies" / "Zombicide.PDF").touch()
+    (pdf_dir / "Azul.pdf").touch()
+    (pdf_dir / "notes.txt").touch()
+
+    assert _build_tree(str(pdf_dir), 3, 10000) == [
+        "├── zombies/",
+        "│   └── Zombicide.PDF",
+        "└── Azul.pdf",
+    ]
+    assert _build_tree(str(pdf_dir), 1, 10000) == ["├── zombies/", "└── Azul.pdf"]
+
+
+def test_build_tree_stops_at_output_limit(mock_settings):
+    """Test that the tree walk stops once the output limit is reached."""
+    from src.rules_lawyer_bot.agent.tools import _build_tree
+
+    pdf_dir = Path(mock_settings.pdf_storage_path)
+    for i in range(100):
+        (pdf_dir / f"Game {i:03}.pdf").touch()
+
+    lines = _build_tree(str(pdf_dir), 3, 100)
+
+    assert 5 < len(lines) < 20
+    assert lines[0] == "├── Game 000.pdf"
+
+
 # Internal implementation of parallel_search_terms for testing
 async def _parallel_search_terms_impl(
     filename: str,
@@ -419,3 +518,264 @@ async def test_parallel_search_terms_truncation(mock_settings):
     # Result should be truncated
     assert len(result_dict["test"]) <= 5050  # 5000 + "(truncated)" message
     assert "(truncated)" in result_dict["test"]
+
+
+def test_build_ugrep_pattern_expands_known_concepts():
+    """Test that known concepts expand to roots and unknown ones pass through."""
+    from src.rules_lawyer_bot.agent.synonyms import SYNONYMS, build_ugrep_pattern
+
+    pattern = build_ugrep_pattern(["Movement", "teleport"])
+
+    assert pattern.split("|") == SYNONYMS["movement"] + ["teleport"]
+
+
+def test_build_ugrep_pattern_deduplicates_roots():
+    """Test that roots shared by several concepts appear only once."""
+    from src.rules_lawyer_bot.agent.synonyms import build_ugrep_pattern
+
+    roots = build_ugrep_pattern(["movement", "action"]).split("|")
+
+    assert roots.count("ход") == 1
+
+
+def test_expand_keywords_keeps_boolean_structure():
+    """Test that AND terms are expanded, while NOT terms and phrases are kept."""
+    from src.rules_lawyer_bot.agent.synonyms import build_ugrep_pattern, expand_keywords
+
+    assert expand_keywords("attack armor -ranged") == (
+        f"{build_ugrep_pattern(['attack'])} armor -ranged"
+    )
+    assert expand_keywords("-attack") == "-attack"
+    assert expand_keywords('"end of turn"') == '"end of turn"'
+
+
+def _fake_processes(monkeypatch, calls: list, stdout: str = "", repeat: int = 1) -> None:
+    """Stand in for the pdftotext and ugrep subprocesses.
+
+    pdftotext writes "extracted text"; ugrep is replaced by a real Python
+    process printing stdout, so output streaming and early termination are
+    exercised.
+    """
+    import sys
+
+    from src.rules_lawyer_bot.agent import tools
+
+    create_subprocess_exec = asyncio.create_subprocess_exec
+
+    async def fake_exec(*cmd, **kwargs):
+        calls.append(list(cmd))
+        if cmd[0] == "pdftotext":
+            Path(cmd[2]).write_text("extracted text", encoding="utf-8")
+            script = "pass"
+        else:
+            script = f"import sys; sys.stdout.write({stdout!r} * {repeat}); sys.exit({0 if stdout else 1})"
+        return await create_subprocess_exec(sys.executable, "-c", script, **kwargs)
+
+    monkeypatch.setattr(tools.asyncio, "create_subprocess_exec", fake_exec)
+
+
+@pytest.mark.asyncio
+async def test_search_inside_files_ugrep_searches_each_file(mock_settings, monkeypatch):
+    """Test that multi-file search merges per-file results under headers."""
+    from src.rules_lawyer_bot.agent import tools
+
+    pdf_dir = Path(settings.pdf_storage_path)
+    for name in ["Root.pdf", "Root - Riverfolk.pdf"]:
+        (pdf_dir / name).write_bytes(b"%PDF-1.4")
+
+    calls = []
+    _fake_processes(monkeypatch, calls, "move")
+
+    result = await tools._search_inside_files_ugrep_impl(
+        ["Root.pdf", "Root - Riverfolk.pdf"], '"crafting"'
+    )
+
+    assert result == "### Root.pdf\nmove\n\n### Root - Riverfolk.pdf\nmove"
+    ugrep_calls = [cmd for cmd in calls if cmd[0] == "ugrep"]
+    assert sorted(cmd[-1] for cmd in ugrep_calls) == ["Root - Riverfolk.pdf", "Root.pdf"]
+
+    # Plain-word queries are answered from the index; files without matches are omitted
+    assert await tools._search_inside_files_ugrep_impl(
+        ["Root.pdf", "Root - Riverfolk.pdf"], "extract"
+    ) == "### Root.pdf\nextracted text\n\n### Root - Riverfolk.pdf\nextracted text"
+    assert await tools._search_inside_files_ugrep_impl(["Root.pdf"], "crafting") == "No matches found"
+
+
+@pytest.mark.asyncio
+async def test_search_inside_file_ugrep_reuses_extracted_text(mock_settings, monkeypatch):
+    """Test that PDF text is extracted once and re-extracted after the PDF changes."""
+    import os
+
+    from src.rules_lawyer_bot.agent import tools
+
+    pdf_path = Path(settings.pdf_storage_path) / "Root.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4")
+
+    calls = []
+    _fake_processes(monkeypatch, calls, "move")
+
+    # Quoted phrases aren't served by the in-memory index, so ugrep runs
+    await tools._search_inside_file_ugrep_impl("Root.pdf", '"move"')
+    await tools._search_inside_file_ugrep_impl("Root.pdf", '"attack"')
+    assert [cmd[0] for cmd in calls] == ["pdftotext", "ugrep", "ugrep"]
+    assert (Path(settings.text_cache_dir) / "Root.pdf").read_text() == "extracted text"
+
+    # Replacing the PDF (new mtime) invalidates the cached text
+    stat = pdf_path.stat()
+    os.utime(pdf_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    await tools._search_inside_file_ugrep_impl("Root.pdf", '"move"')
+    assert [cmd[0] for cmd in calls][3:] == ["pdftotext", "ugrep"]
+
+
+@pytest.mark.asyncio
+async def test_search_inside_file_ugrep_caches_results(mock_settings, monkeypatch):
+    """Test that repeated identical searches don't run ugrep again."""
+    from src.rules_lawyer_bot.agent import tools
+
+    (Path(settings.pdf_storage_path) / "Root.pdf").write_bytes(b"%PDF-1.4")
+
+    calls = []
+    _fake_processes(monkeypatch, calls, "move")
+
+    first = await tools._search_inside_file_ugrep_impl("Root.pdf", '"crafting"')
+    second = await tools._search_inside_file_ugrep_impl("Root.pdf", '"crafting"')
+    await tools._search_inside_file_ugrep_impl("Root.pdf", '"crafting"', fuzzy=True)
+
+    assert first == second == "move"
+    assert [cmd[0] for cmd in calls] == ["pdftotext", "ugrep", "ugrep"]
+
+
+@pytest.mark.asyncio
+async def test_run_ugrep_stops_at_output_limit(mock_settings, monkeypatch):
+    """Test that long ugrep output is cut off at the limit and marked truncated."""
+    from src.rules_lawyer_bot.agent import tools
+
+    Path(settings.text_cache_dir).mkdir(parents=True, exist_ok=True)
+    calls = []
+    _fake_processes(monkeypatch, calls, "x", repeat=1_000_000)
+
+    result = await tools._run_ugrep(["ugrep", "x"], "x")
+
+    assert result == "x" * tools._MAX_OUTPUT_CHARS + "\n...(truncated)"
+
+
+@pytest.mark.asyncio
+async def test_search_inside_file_ugrep_uses_index(mock_settings, monkeypatch):
+    """Test that plain-word queries are answered without running ugrep."""
+    from src.rules_lawyer_bot.agent import tools
+
+    (Path(settings.pdf_storage_path) / "Root.pdf").write_bytes(b"%PDF-1.4")
+
+    calls = []
+    _fake_processes(monkeypatch, calls)
+
+    assert await tools._search_inside_file_ugrep_impl("Root.pdf", "extract|foo") == "extracted text"
+    assert await tools._search_inside_file_ugrep_impl("Root.pdf", "text -extract") == "No matches found"
+    assert [cmd[0] for cmd in calls] == ["pdftotext"]
+
+
+@pytest.mark.asyncio
+async def test_search_inside_files_ugrep_missing_file(mock_settings):
+    """Test that multi-file search reports missing files."""
+    from src.rules_lawyer_bot.agent import tools
+
+    with pytest.raises(FileNotFoundError, match="Nope.pdf"):
+        await tools._search_inside_files_ugrep_impl(["Nope.pdf"], "move")
+
+
+def test_library_pdf_names_cache_invalidated_on_change(mock_settings):
+    """Test that the cached PDF listing refreshes when the library changes."""
+    import os
+
+    from src.rules_lawyer_bot.agent import tools
+
+    pdf_dir = Path(settings.pdf_storage_path)
+    (pdf_dir / "Azul.pdf").write_bytes(b"%PDF-1.4")
+    assert tools.library_pdf_names() == ["Azul.pdf"]
+
+    # Same mtime: cached listing is served
+    mtime_ns = pdf_dir.stat().st_mtime_ns
+    (pdf_dir / "Root.pdf").write_bytes(b"%PDF-1.4")
+    os.utime(pdf_dir, ns=(mtime_ns, mtime_ns))
+    assert tools.library_pdf_names() == ["Azul.pdf"]
+
+    # Library mtime changed: listing is rebuilt
+    os.utime(pdf_dir, ns=(mtime_ns, mtime_ns + 1_000_000_000))
+    assert tools.library_pdf_names() == ["Azul.pdf", "Root.pdf"]
+
+
+@pytest.mark.asyncio
+async def test_warm_text_cache_extracts_all_pdfs(mock_settings, monkeypatch):
+    """Test that warm-up extracts every library PDF once."""
+    from src.rules_lawyer_bot.agent import tools
+
+    pdf_dir = Path(settings.pdf_storage_path)
+    for name in ["Azul.pdf", "Root.pdf"]:
+        (pdf_dir / name).write_bytes(b"%PDF-1.4")
+
+    calls = []
+    _fake_processes(monkeypatch, calls)
+
+    await tools.warm_text_cache()
+    await tools.warm_text_cache()
+
+    assert sorted(cmd[1] for cmd in calls) == [
+        str(pdf_dir / "Azul.pdf"),
+        str(pdf_dir / "Root.pdf"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bounded_map_limits_concurrency():
+    """Test that _bounded_map keeps order, captures errors and bounds workers."""
+    from src.rules_lawyer_bot.agent import tools
+
+    running = 0
+    peak = 0
+
+    async def work(item: int) -> int:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if item == 3:
+            raise ValueError("bad item")
+        return item * 10
+
+    results = await tools._bounded_map(work, [1, 2, 3, 4, 5], limit=2)
+
+    assert results[:2] == [10, 20]
+    assert isinstance(results[2], ValueError)
+    assert results[3:] == [40, 50]
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_search_cached_hit_skips_extraction(mock_settings, monkeypatch):
+    """Test that a result cache hit is served before the text is extracted."""
+    from src.rules_lawyer_bot.agent import tools
+
+    (Path(mock_settings.pdf_storage_path) / "game.pdf").touch()
+    key = tools._search_cache_key(["game.pdf"], "attack", False)
+    monkeypatch.setitem(tools._search_cache, key, "cached output")
+
+    async def fail(*args, **kwargs):
+        raise AssertionError("should not run")
+
+    monkeypatch.setattr(tools, "_ensure_text_cached", fail)
+
+    assert await tools._search_cached(["game.pdf"], "attack", False) == "cached output"
+
+
+def test_dumps_indented_matches_stdlib_json(monkeypatch):
+    """Test that tool JSON output is the same with or without orjson."""
+    from src.rules_lawyer_bot.agent import tools
+
+    data = {"атака": "Удар наносит 2 урона\n--\n\"quoted\"", "move": "No matches found"}
+    expected = json.dumps(data, ensure_ascii=False, indent=2)
+
+    assert tools._dumps_indented(data) == expected
+
+    monkeypatch.setattr(tools, "orjson", None)
+    assert tools._dumps_indented(data) == expected